@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends, Request, Response
+
+from app.core.dependencies import require_metrics_access
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, collect_samples, metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def prometheus_metrics(request: Request):
+    """Request, database, threadpool and rate limiter metrics for this worker in Prometheus format"""
+    return Response(metrics.render(collect_samples(request.app)), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,15 +1,26 @@
 """Settings API endpoint for displaying application configuration"""
 
-from fastapi import APIRouter, Request
+import os
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import cached, response_cache
+from app.core.config import settings_provider
+from app.core.dependencies import require_profiling_access
+from app.core.idempotency import idempotency_store
+from app.core.profiler import ProfilerBusy, collapsed, profiler
+from app.core.response import error, json_response
 
 router = APIRouter()
 
 @router.get("/")
-def get_settings_info(request: Request):
+@cached(tags=["settings"])
+async def get_settings_info(request: Request):
     """Get current application settings (excluding sensitive data)"""
     settings = request.app.state.settings
     
-    return {
+    return json_response({
         "application": {
             "name": settings.APP_NAME,
             "description": settings.APP_DESCRIPTION,
@@ -39,24 +50,123 @@ def get_settings_info(request: Request):
         "environment_flags": {
             "is_development": settings.is_development,
             "is_production": settings.is_production,
-        }
-    }
+        },
+        "reload": {
+            "loaded_at": settings_provider.loaded_at,
+            "reloads": settings_provider.reloads,
+            "failed_reloads": settings_provider.failed_reloads,
+        },
+    })
 
 @router.get("/health")
-def settings_health_check(request: Request):
+async def settings_health_check(request: Request):
     """Health check endpoint that uses settings"""
     settings = request.app.state.settings
+    health_monitor = request.app.state.health_monitor
     
-    return {
-        "status": "healthy",
+    return json_response({
+        "status": "healthy" if health_monitor.ready else "degraded",
         "environment": settings.ENVIRONMENT.value,
         "database_configured": bool(settings.POSTGRES_URL),
+        "database_connected": health_monitor.is_healthy("database"),
         "redis_configured": bool(settings.REDIS_HOST),
+        "redis_connected": health_monitor.is_healthy("redis"),
         "app_version": settings.APP_VERSION,
-    }
+    })
+
+@router.get("/database/pool")
+async def database_pool_stats(request: Request):
+    """Connection pool and statement cache configuration and live statistics for this worker"""
+    settings = request.app.state.settings
+    db_manager = request.app.state.db_manager
+    
+    return json_response({
+        "worker_pid": os.getpid(),
+        "configuration": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+            "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "transaction_pooler": settings.DB_TRANSACTION_POOLER,
+        },
+        "pools": db_manager.pool_status(),
+        "statement_caches": db_manager.statement_cache_status(),
+        "read_replicas": db_manager.replicas.status(),
+    })
+
+@router.get("/cache")
+async def response_cache_stats():
+    """Response cache hit/miss metrics for this worker"""
+    return json_response({
+        "worker_pid": os.getpid(),
+        "cache": response_cache.stats(),
+    })
+
+@router.get("/idempotency")
+async def idempotency_stats():
+    """Idempotency-Key replays, waits and stored responses for this worker"""
+    return json_response({
+        "worker_pid": os.getpid(),
+        "idempotency": idempotency_store.stats(),
+    })
+
+@router.get("/passwords")
+async def password_hashing_stats(request: Request):
+    """Password hashing pool queue depth and hash times for this worker"""
+    return json_response({
+        "worker_pid": os.getpid(),
+        "environment": request.app.state.settings.ENVIRONMENT.value,
+        "hashing": request.app.state.password_hasher.stats(),
+    })
+
+@router.get("/email")
+async def email_delivery_stats(request: Request):
+    """Email queue depth, delivery counts and batch send times for this worker"""
+    return json_response({
+        "worker_pid": os.getpid(),
+        "email": await request.app.state.mailer.stats(),
+    })
+
+@router.post("/profile", dependencies=[Depends(require_profiling_access)], include_in_schema=False)
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(default=10.0, gt=0),
+    interval_ms: float = Query(default=10.0, ge=1, le=1000),
+    request_fraction: float = Query(default=0.0, ge=0, le=1),
+):
+    """Sample this worker's stacks for a while and return them as collapsed stacks.
+
+    With ``request_fraction`` only samples taken while one of the picked
+    requests runs are kept. Feed the output to flamegraph.pl or speedscope.
+    """
+    settings = request.app.state.settings
+    if request_fraction and not profiler.installed:
+        return error(
+            status=status.HTTP_409_CONFLICT,
+            message="Request sampling needs PROFILING_ENABLED at startup",
+            data=None,
+        )
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    try:
+        stacks = await profiler.profile(seconds, interval=interval_ms / 1000, request_fraction=request_fraction)
+    except ProfilerBusy as exc:
+        return error(status=status.HTTP_409_CONFLICT, message=str(exc), data=None)
+    return PlainTextResponse(
+        collapsed(stacks),
+        headers={
+            "X-Worker-Pid": str(os.getpid()),
+            "X-Profile-Seconds": str(seconds),
+            "X-Profile-Samples": str(sum(stacks.values())),
+        },
+    )
 
 @router.get("/demo/environment-behavior")
-def demo_environment_behavior(request: Request):
+@cached(tags=["settings"])
+async def demo_environment_behavior(request: Request):
     """Demo endpoint showing environment-specific behavior"""
     settings = request.app.state.settings
     
@@ -95,10 +205,11 @@ def demo_environment_behavior(request: Request):
             }
         })
     
-    return response
+    return json_response(response)
 
 @router.get("/demo/feature-flags")
-def demo_feature_flags(request: Request):
+@cached(tags=["settings"])
+async def demo_feature_flags(request: Request):
     """Demo endpoint showing feature flag usage"""
     settings = request.app.state.settings
     
@@ -119,4 +230,4 @@ def demo_feature_flags(request: Request):
             "description": "This feature is currently inactive"
         }
     
-    return features
+    return json_response(features)
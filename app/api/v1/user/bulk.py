@@ -0,0 +1,279 @@
+"""Bulk user import: JSON array or NDJSON input, batched inserts, per-record results"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from app.api.v1.user.dto import create_user_dto, validate_create_user
+from app.api.v1.user.repository import UserRepository
+from app.core.exception_handler import format_validation_errors
+from app.core.passwords import PasswordHasher, PasswordHasherBusy
+from app.core.rate_limiter import hit_weighted
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+logger = logging.getLogger(__name__)
+
+
+def is_row_error(error: SQLAlchemyError) -> bool:
+    """Whether the database rejected a row's values, leaving the connection usable"""
+    return isinstance(error, (DataError, IntegrityError)) and not error.connection_invalidated
+
+
+class InvalidRecord:
+    """Placeholder for an input line that is not valid JSON"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+class BulkInputError(ValueError):
+    """The request body as a whole cannot be read as records"""
+
+
+class BulkBodyTooLarge(BulkInputError):
+    """The request body is over the configured size limit"""
+
+
+async def iter_ndjson(request: Request, max_line_bytes: int) -> AsyncIterator[Any]:
+    """Parse newline-delimited JSON as it streams in.
+
+    A line longer than ``max_line_bytes`` becomes one invalid record and the
+    rest of it is skipped, so a body without newlines cannot grow the buffer
+    without bound.
+    """
+    too_long = InvalidRecord(f"line longer than {max_line_bytes} bytes")
+    buffer = b""
+    skipping = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                # The end of a line already reported as too long
+                skipping = False
+            elif len(line) > max_line_bytes:
+                yield too_long
+            elif line.strip():
+                yield _parse_line(line)
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield too_long
+                skipping = True
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return InvalidRecord("invalid JSON")
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """The whole body, reading no more than ``max_bytes``"""
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise BulkBodyTooLarge(f"Body is larger than {max_bytes} bytes")
+    return bytes(body)
+
+
+async def iter_records(request: Request, max_body_bytes: int, max_line_bytes: int) -> AsyncIterator[Any]:
+    """Records from an NDJSON stream or a JSON array body.
+
+    A declared Content-Length over ``max_body_bytes`` is rejected before
+    anything is read. A JSON array has to be parsed whole, so its body is
+    also capped while it is read; an NDJSON stream is bounded per line and by
+    the record limit instead.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_body_bytes:
+        raise BulkBodyTooLarge(f"Body is larger than {max_body_bytes} bytes")
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        async for record in iter_ndjson(request, max_line_bytes):
+            yield record
+        return
+
+    body = await read_body(request, max_body_bytes)
+    try:
+        records = json.loads(body)
+    except ValueError as exc:
+        raise BulkInputError("Body must be a JSON array or NDJSON") from exc
+    if not isinstance(records, list):
+        raise BulkInputError("Body must be a JSON array or NDJSON")
+    for record in records:
+        yield record
+
+
+class BulkUserImport:
+    """Validates records in a single pass and writes them in batches.
+
+    Each batch is charged against the weight-based bulk limit before it is
+    written; once the limit is exhausted, password hashing is over capacity
+    or the database fails, the import stops and the remaining records are
+    not processed. Batches written before that keep their results. A record
+    the database rejects (bad data or a constraint) fails on its own.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        hasher: PasswordHasher,
+        client_key: str,
+        batch_size: int,
+        max_records: int,
+        rate_limit: str,
+        first_error: bool = False,
+        hash_chunk_size: Optional[int] = None,
+    ):
+        self.users = users
+        self.hasher = hasher
+        self.client_key = client_key
+        self.batch_size = batch_size
+        self.max_records = max_records
+        self.rate_limit = rate_limit
+        self.first_error = first_error
+        self.hash_chunk_size = hash_chunk_size
+        self.results: List[dict] = []
+        self.rate_limited = False
+        self.unavailable = False
+        self.failed = False
+        self.truncated = False
+        self._batch: List[Tuple[int, create_user_dto]] = []
+        # Records read but not yet validated
+        self._pending: List[Tuple[int, Any]] = []
+        self._seen_emails = set()
+
+    async def _flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        allowed = await run_in_threadpool(
+            hit_weighted, self.rate_limit, "users-bulk", self.client_key, len(batch)
+        )
+        if not allowed:
+            self.rate_limited = True
+            self.results.extend({"index": index, "status": "rate_limited"} for index, _ in batch)
+            return
+
+        try:
+            password_hashes = await self.hasher.hash_many(
+                [user.password for _, user in batch], chunk_size=self.hash_chunk_size
+            )
+        except PasswordHasherBusy:
+            self.unavailable = True
+            self.results.extend({"index": index, "status": "unavailable"} for index, _ in batch)
+            return
+
+        await self._insert([(index, user, password_hash) for (index, user), password_hash in zip(batch, password_hashes)])
+
+    async def _insert(self, rows: List[Tuple[int, create_user_dto, str]]):
+        """Insert rows in one statement; when the database rejects a row, split to find it.
+
+        Halves are retried until the rejected rows are isolated, so only they
+        are reported as errors. Any other database failure stops the import.
+        """
+        if self.failed:
+            self.results.extend({"index": index, "status": "error"} for index, _, _ in rows)
+            return
+        try:
+            ids = await self.users.create_many([
+                {"fname": user.fname, "lname": user.lname, "email": user.email, "password_hash": password_hash}
+                for _, user, password_hash in rows
+            ])
+        except SQLAlchemyError as exc:
+            if is_row_error(exc) and len(rows) > 1:
+                middle = len(rows) // 2
+                await self._insert(rows[:middle])
+                await self._insert(rows[middle:])
+                return
+            if is_row_error(exc):
+                index, user, _ = rows[0]
+                logger.warning(f"Bulk import record {index} ({user.email}) rejected: {type(exc).__name__}: {exc}")
+            else:
+                logger.error(f"Bulk insert of {len(rows)} users failed: {type(exc).__name__}: {exc}")
+                self.failed = True
+            self.results.extend({"index": index, "status": "error"} for index, _, _ in rows)
+            return
+        for index, user, _ in rows:
+            user_id = ids.get(user.email)
+            if user_id is None:
+                self.results.append({"index": index, "status": "duplicate", "email": user.email})
+            else:
+                self.results.append({"index": index, "status": "created", "id": user_id})
+
+    def _validate(self, index: int, record: Any):
+        if isinstance(record, InvalidRecord):
+            self.results.append({"index": index, "status": "invalid", "errors": {"record": record.message}})
+            return
+        try:
+            user = validate_create_user(record, first_error=self.first_error)
+        except ValidationError as exc:
+            self.results.append({"index": index, "status": "invalid", "errors": format_validation_errors(exc.errors())})
+            return
+        if user.email in self._seen_emails:
+            self.results.append({"index": index, "status": "duplicate", "email": user.email})
+            return
+        self._seen_emails.add(user.email)
+        self._batch.append((index, user))
+
+    def _validate_many(self, records: List[Tuple[int, Any]]):
+        for index, record in records:
+            self._validate(index, record)
+
+    async def _validate_pending(self):
+        """Validate the records read so far on the threadpool; pydantic and email-validator are CPU bound"""
+        pending, self._pending = self._pending, []
+        if pending:
+            await run_in_threadpool(self._validate_many, pending)
+
+    @property
+    def stopped(self) -> bool:
+        return self.rate_limited or self.unavailable or self.failed
+
+    async def run(self, records: AsyncIterator[Any]) -> dict:
+        index = 0
+        async for record in records:
+            if index >= self.max_records:
+                self.truncated = True
+                break
+            self._pending.append((index, record))
+            index += 1
+            # Never validate more than fits in the batch, so it stays within batch_size
+            if len(self._batch) + len(self._pending) >= self.batch_size:
+                await self._validate_pending()
+                if len(self._batch) >= self.batch_size:
+                    await self._flush()
+                    if self.stopped:
+                        break
+        if not self.stopped:
+            await self._validate_pending()
+            await self._flush()
+
+        self.results.sort(key=lambda result: result["index"])
+        counts = {}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return {
+            "received": index,
+            "created": counts.get("created", 0),
+            "duplicate": counts.get("duplicate", 0),
+            "invalid": counts.get("invalid", 0),
+            "rate_limited": counts.get("rate_limited", 0),
+            "unavailable": counts.get("unavailable", 0),
+            "error": counts.get("error", 0),
+            "stopped_early": self.stopped or self.truncated,
+            "results": self.results,
+        }
@@ -1,59 +1,236 @@
-from fastapi import APIRouter, Request, status, Depends
+from typing import Optional
 
-from app.api.v1.user.dto import create_user_dto
-from app.core.dependencies import get_settings
+from fastapi import APIRouter, Request, status, Depends, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from slowapi.util import get_remote_address
+from sqlalchemy.exc import IntegrityError
+
+from app.api.v1.user.bulk import BulkBodyTooLarge, BulkInputError, BulkUserImport, NDJSON_MEDIA_TYPES, iter_records
+from app.api.v1.user.dto import create_user_dto, user_dto, validate_create_user
+from app.api.v1.user.export import MEDIA_TYPES, ExportFormat, encode_export
+from app.api.v1.user.repository import UserExport, UserRepository, decode_cursor, encode_cursor, get_user_export, get_user_repository
+from app.core.cache import cached, response_cache
+from app.core.idempotency import idempotent
+from app.core.dependencies import get_mailer, get_password_hasher, get_settings
 from app.core.config import Settings
-from app.core.rate_limiter import limiter
-from app.core.response import success
+from app.core.mail import Mailer
+from app.core.metrics import metrics, route_label
+from app.core.passwords import PasswordHasher, PasswordHasherBusy
+from app.core.rate_limiter import limit
+from app.core.response import error, json_response, success
 
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+HASHER_BUSY_RETRY_AFTER = "1"
+
+
+def hasher_busy():
+    """503 telling the client to retry once password hashing capacity frees up"""
+    response = error(
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        message="Too many signups in progress, please retry shortly",
+        data=None,
+    )
+    response.headers["Retry-After"] = HASHER_BUSY_RETRY_AFTER
+    return response
+
+
+async def create_user_payload(request: Request, settings: Settings = Depends(get_settings)) -> create_user_dto:
+    """Request body as create_user_dto; stops at the first error when VALIDATION_FIRST_ERROR is on"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", 0), "msg": "JSON decode error", "input": {}}]
+        )
+    try:
+        return validate_create_user(data, first_error=settings.VALIDATION_FIRST_ERROR)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+        )
 
-users = [
-    {"name": "John"},
-    {"name": "Jane"},
-    {"name": "Joe"},
-]
 
+CREATE_USER_REQUEST_SCHEMA = create_user_dto.model_json_schema()
 
-@router.post("/")
-@limiter.limit("1/minute")
-def create_user(
-    request: Request, 
-    payload: create_user_dto,
-    settings: Settings = Depends(get_settings)
+
+@router.post(
+    "/",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CREATE_USER_REQUEST_SCHEMA}},
+        }
+    },
+)
+# Outside the limit, so retries replaying the stored response are not rejected by it
+@idempotent()
+@limit("1/minute")
+async def create_user(
+    request: Request,
+    payload: create_user_dto = Depends(create_user_payload),
+    settings: Settings = Depends(get_settings),
+    users: UserRepository = Depends(get_user_repository),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    mailer: Mailer = Depends(get_mailer),
 ):
+    try:
+        password_hash = await hasher.hash(payload.password)
+    except PasswordHasherBusy:
+        return hasher_busy()
+
+    try:
+        user = await users.create(
+            fname=payload.fname,
+            lname=payload.lname,
+            email=payload.email,
+            password_hash=password_hash,
+        )
+    except IntegrityError:
+        return error(
+            status=status.HTTP_409_CONFLICT,
+            message="A user with this email already exists",
+            data=None,
+        )
+    await response_cache.invalidate("users")
+    # Only queued here; delivery happens in the background and never fails the signup
+    await mailer.send(
+        to=user.email,
+        subject=f"Welcome to {settings.APP_NAME}",
+        body=f"Hi {user.fname},\n\nYour {settings.APP_NAME} account is ready.\n",
+    )
+
     # Example of using settings in the controller
     return success(
         status=status.HTTP_201_CREATED,
         success=True,
         message=f"User registered successfully in {settings.ENVIRONMENT.value} environment",
         data={
-            **payload.dict(),
+            **user_dto.model_validate(user).model_dump(mode="json"),
             "app_version": settings.APP_VERSION,
             "feature_x_enabled": settings.FEATURE_X_ENABLED
         },
     )
 
 
+BULK_REQUEST_SCHEMA = {"type": "array", "items": CREATE_USER_REQUEST_SCHEMA}
+
+
+@router.post(
+    "/bulk",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BULK_REQUEST_SCHEMA},
+                NDJSON_MEDIA_TYPES[0]: {"schema": CREATE_USER_REQUEST_SCHEMA},
+            },
+        }
+    },
+)
+async def create_users_bulk(
+    request: Request,
+    settings: Settings = Depends(get_settings),
+    users: UserRepository = Depends(get_user_repository),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+):
+    """Create many users from a JSON array or an NDJSON stream, with a result per record"""
+    bulk = BulkUserImport(
+        users,
+        hasher,
+        client_key=get_remote_address(request),
+        batch_size=settings.USERS_BULK_BATCH_SIZE,
+        max_records=settings.USERS_BULK_MAX_RECORDS,
+        rate_limit=settings.USERS_BULK_RATE_LIMIT,
+        first_error=settings.VALIDATION_FIRST_ERROR,
+        hash_chunk_size=settings.USERS_BULK_HASH_CHUNK_SIZE,
+    )
+    try:
+        summary = await bulk.run(
+            iter_records(request, settings.USERS_BULK_MAX_BODY_BYTES, settings.USERS_BULK_MAX_LINE_BYTES)
+        )
+    except BulkBodyTooLarge as exc:
+        return error(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=str(exc), data=None)
+    except BulkInputError as exc:
+        return error(status=status.HTTP_400_BAD_REQUEST, message=str(exc), data=None)
+
+    if summary["created"]:
+        await response_cache.invalidate("users")
+    if summary["rate_limited"]:
+        metrics.reject(route_label(request.scope))
+    if summary["rate_limited"] and not summary["created"]:
+        return error(status=status.HTTP_429_TOO_MANY_REQUESTS, message="Too many requests", data=summary)
+    if summary["unavailable"] and not summary["created"]:
+        return hasher_busy()
+    if bulk.failed and not summary["created"]:
+        return error(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Users could not be saved", data=summary)
+
+    return success(
+        status=status.HTTP_200_OK,
+        message=f"Created {summary['created']} of {summary['received']} users",
+        data=summary,
+    )
+
+
 @router.get("/")
-def get_users(settings: Settings = Depends(get_settings)):
-    return {
-        "message": users,
+@cached(tags=["users"])
+async def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    settings: Settings = Depends(get_settings),
+    users: UserRepository = Depends(get_user_repository),
+):
+    try:
+        after_id = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return error(status=status.HTTP_400_BAD_REQUEST, message="Invalid cursor", data=None)
+
+    page, last_id = await users.list_page(limit=limit, after_id=after_id)
+    return json_response({
+        "message": [user_dto.model_validate(user) for user in page],
         "environment": settings.ENVIRONMENT.value,
-        "total_users": len(users)
-    }
+        "limit": limit,
+        "next_cursor": encode_cursor(last_id) if last_id is not None else None,
+    })
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+async def export_users(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson (one JSON object per line) or csv"),
+    settings: Settings = Depends(get_settings),
+    export: UserExport = Depends(get_user_export),
+):
+    """Stream every user as NDJSON or CSV; memory use stays flat whatever the table size"""
+    return StreamingResponse(
+        encode_export(export(settings.USERS_EXPORT_BATCH_SIZE), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format.value}"'},
+    )
 
 
 @router.get("/{user_id}")
-def get_user(user_id: int, settings: Settings = Depends(get_settings)):
-    if user_id >= len(users):
-        return {
-            "error": "User not found",
-            "environment": settings.ENVIRONMENT.value
-        }
-    return {
-        "message": users[user_id],
+async def get_user(
+    user_id: int,
+    settings: Settings = Depends(get_settings),
+    users: UserRepository = Depends(get_user_repository),
+):
+    user = await users.get(user_id)
+    if user is None:
+        return error(
+            status=status.HTTP_404_NOT_FOUND,
+            message="User not found",
+            data={"environment": settings.ENVIRONMENT.value},
+        )
+    return json_response({
+        "message": user_dto.model_validate(user),
         "environment": settings.ENVIRONMENT.value
-    }
+    })
@@ -1,25 +1,94 @@
-from pydantic import BaseModel, EmailStr, field_validator, Field
+from datetime import datetime
+from typing import Annotated, Any, Dict
+
+from pydantic import AfterValidator, BaseModel, BeforeValidator, ConfigDict, EmailStr, Field, create_model
+from pydantic_core import PydanticCustomError
 import re
 
 
+# Rules use patterns compiled once at import and native pydantic-core
+# constraints where those give the same error messages as before
+NAME_LETTERS = re.compile(r"^[a-zA-Z]+$")
+PASSWORD_LETTER = re.compile(r"[A-Za-z]")
+PASSWORD_DIGIT = re.compile(r"[0-9]")
+PASSWORD_SPECIAL = re.compile(r'[!@#$%^&*(),.?":{}|<>]')
+
+
+def name_letters(value: str) -> str:
+    if " " in value:
+        raise ValueError("must not contain spaces")
+    if not NAME_LETTERS.match(value):
+        raise ValueError("must only contain letters")
+    return value
+
+
+def email_shape(value):
+    """Reject addresses without an @-sign before the comparatively slow email-validator runs"""
+    if isinstance(value, str) and "@" not in value:
+        # Same error email-validator reports, so the fast path is invisible to clients
+        raise PydanticCustomError(
+            "value_error",
+            "value is not a valid email address: {reason}",
+            {"reason": "An email address must have an @-sign."},
+        )
+    return value
+
+
+def password_complexity(value: str) -> str:
+    if not PASSWORD_LETTER.search(value) or not PASSWORD_DIGIT.search(value):
+        raise ValueError("must contain at least one letter and one number")
+    if not PASSWORD_SPECIAL.search(value):
+        raise ValueError("must contain at least one special character")
+    return value
+
+
+# Bounded by the users.fname / users.lname columns (String(100))
+NAME_MAX_LENGTH = 100
+# Keeps oversized input away from the password hasher
+PASSWORD_MAX_LENGTH = 128
+
+Name = Annotated[str, Field(max_length=NAME_MAX_LENGTH), AfterValidator(name_letters)]
+Email = Annotated[EmailStr, BeforeValidator(email_shape)]
+Password = Annotated[str, Field(min_length=8, max_length=PASSWORD_MAX_LENGTH), AfterValidator(password_complexity)]
+
+
 class create_user_dto(BaseModel):
+    fname: Name
+    lname: Name
+    email: Email
+    password: Password
+
+
+# One single-field model per field, in declaration order, for first-error
+# validation; errors come out with the same title, loc and messages as the full model
+_FIELD_MODELS = [
+    (name, create_model(create_user_dto.__name__, **{name: (field.annotation, field)}))
+    for name, field in create_user_dto.model_fields.items()
+]
+
+
+def validate_create_user(data: Any, first_error: bool = False) -> create_user_dto:
+    """Validate a create_user_dto payload.
+
+    With ``first_error`` fields are checked one at a time and validation stops
+    at the first failing field, so rejected payloads cost only the checks up
+    to the first problem. Raises ValidationError either way.
+    """
+    if not first_error or not isinstance(data, dict):
+        return create_user_dto.model_validate(data)
+
+    values: Dict[str, Any] = {}
+    for name, model in _FIELD_MODELS:
+        field_data = {name: data[name]} if name in data else {}
+        values[name] = getattr(model.model_validate(field_data), name)
+    return create_user_dto.model_construct(**values)
+
+
+class user_dto(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
     fname: str
     lname: str
-    email: EmailStr
-    password: str = Field(..., min_length=8)
-
-    @field_validator("fname", "lname")
-    def name_must_not_contain_space(cls, value):
-        if " " in value:
-            raise ValueError("must not contain spaces")
-        if not re.match("^[a-zA-Z]+$", value):
-            raise ValueError("must only contain letters")
-        return value
-
-    @field_validator("password")
-    def password_complexity(cls, value):
-        if not re.search(r"[A-Za-z]", value) or not re.search(r"[0-9]", value):
-            raise ValueError("must contain at least one letter and one number")
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', value):
-            raise ValueError("must contain at least one special character")
-        return value
+    email: str
+    created_at: datetime
@@ -0,0 +1,61 @@
+"""Streaming user export: NDJSON or CSV, one chunk per server-side cursor batch"""
+
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator, Iterable, Sequence
+
+from pydantic_core import to_json
+
+from app.api.v1.user.dto import user_dto
+
+
+# Exported columns, in order; the same fields as the list endpoint (never password_hash)
+EXPORT_FIELDS = tuple(user_dto.model_fields)
+
+
+class ExportFormat(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def encode_ndjson(rows: Iterable) -> bytes:
+    return b"".join(
+        to_json({field: getattr(row, field) for field in EXPORT_FIELDS}) + b"\n" for row in rows
+    )
+
+
+def _csv_value(value):
+    # Same timestamp text as the JSON formats
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_csv(rows: Iterable, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([_csv_value(getattr(row, field)) for field in EXPORT_FIELDS] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def encode_export(batches: AsyncIterator[Sequence], format: ExportFormat) -> AsyncIterator[bytes]:
+    """Encode each batch of rows as it arrives.
+
+    Nothing is read ahead: the next batch is fetched only once the previous
+    chunk has been sent, so a slow client holds back the cursor instead of
+    filling the worker's memory.
+    """
+    if format == ExportFormat.CSV:
+        yield encode_csv((), header=True)
+        async for rows in batches:
+            yield encode_csv(rows)
+    else:
+        async for rows in batches:
+            yield encode_ndjson(rows)
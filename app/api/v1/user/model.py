@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, func
+
+from app.core.db.database import Base
+
+
+class User(Base):
+    __tablename__ = "users"
+    # Fetch server defaults (created_at) through INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Primary key doubles as the keyset pagination cursor
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    fname = Column(String(100), nullable=False)
+    lname = Column(String(100), nullable=False)
+    email = Column(String(320), nullable=False, unique=True, index=True)
+    password_hash = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,208 @@
+"""Async data access for users"""
+
+import base64
+import binascii
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Depends
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.user.export import EXPORT_FIELDS
+from app.api.v1.user.model import User
+from app.core.db.database import DatabaseManager
+from app.core.db.statements import hot_query
+from app.core.dependencies import get_db_manager
+
+
+# Called with a batch size; yields every user's exported columns in batches
+UserExport = Callable[[int], AsyncIterator[Sequence]]
+
+
+@hot_query
+def _user_by_id():
+    return select(User).where(User.id == bindparam("user_id"))
+
+
+@hot_query
+def _first_page():
+    return select(User).order_by(User.id).limit(bindparam("limit"))
+
+
+@hot_query
+def _page_after():
+    return select(User).where(User.id > bindparam("after_id")).order_by(User.id).limit(bindparam("limit"))
+
+
+def encode_cursor(user_id: int) -> str:
+    """Opaque cursor pointing just after a user id"""
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+class UserRepository:
+    """Users table access through an AsyncSession.
+
+    Listing and lookups go through ``read_session`` (a replica when one is
+    configured and fresh enough); writes always use ``session`` (the primary).
+    Either can be given as a factory instead, so it is only opened when a
+    method first needs it and a read-only request never opens a primary
+    session (and vice versa); ``close()`` closes what was opened.
+    """
+
+    def __init__(
+        self,
+        session: Optional[AsyncSession] = None,
+        read_session: Optional[AsyncSession] = None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        read_session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self._session = session
+        self._read_session = read_session
+        self._session_factory = session_factory
+        self._read_session_factory = read_session_factory
+        self._opened: List[AsyncSession] = []
+
+    @property
+    def session(self) -> AsyncSession:
+        """Primary session, opened on first use"""
+        if self._session is None:
+            self._session = self._session_factory()
+            self._opened.append(self._session)
+        return self._session
+
+    @property
+    def read_session(self) -> AsyncSession:
+        """Session for reads, opened on first use; the primary session when no read session was given"""
+        if self._read_session is None:
+            if self._read_session_factory is None:
+                return self.session
+            self._read_session = self._read_session_factory()
+            self._opened.append(self._read_session)
+        return self._read_session
+
+    async def close(self):
+        """Close the sessions this repository opened itself"""
+        opened, self._opened = self._opened, []
+        for session in opened:
+            await session.close()
+
+    async def list_page(self, limit: int, after_id: Optional[int] = None) -> Tuple[List[User], Optional[int]]:
+        """One page of users ordered by id, plus the id to continue after (if any).
+
+        Keyset pagination: an index range scan on the primary key, so the
+        cost of a page does not grow with the table or the page number.
+        """
+        if after_id is None:
+            result = await self.read_session.scalars(_first_page(), {"limit": limit + 1})
+        else:
+            result = await self.read_session.scalars(_page_after(), {"after_id": after_id, "limit": limit + 1})
+        users = list(result.all())
+        if len(users) > limit:
+            users = users[:limit]
+            return users, users[-1].id
+        return users, None
+
+    async def stream(self, batch_size: int) -> AsyncIterator[Sequence]:
+        """Every user's exported columns in id order, ``batch_size`` rows at a time.
+
+        Rows come through a server-side cursor (``yield_per``), so only one
+        batch is held in memory whatever the size of the table. Plain column
+        rows rather than User objects skip the ORM identity map.
+        """
+        statement = (
+            select(*(getattr(User, field) for field in EXPORT_FIELDS))
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.read_session.stream(statement)
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
+    async def get(self, user_id: int) -> Optional[User]:
+        """Primary key lookup"""
+        return (await self.read_session.scalars(_user_by_id(), {"user_id": user_id})).one_or_none()
+
+    async def create(self, fname: str, lname: str, email: str, password_hash: Optional[str] = None) -> User:
+        """Insert a user and commit; raises IntegrityError on a duplicate email"""
+        user = User(fname=fname, lname=lname, email=email, password_hash=password_hash)
+        self.session.add(user)
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return user
+
+    async def create_many(self, rows: List[dict]) -> Dict[str, int]:
+        """Insert users with one multi-row INSERT, skipping existing emails.
+
+        Returns the ids of the inserted rows keyed by email; rows missing
+        from the result already existed.
+        """
+        if not rows:
+            return {}
+        dialect = self.session.bind.dialect.name
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = (
+            insert(User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id, User.email)
+        )
+        try:
+            inserted = (await self.session.execute(statement)).all()
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return {email: user_id for user_id, email in inserted}
+
+
+async def get_user_repository(
+    db_manager: DatabaseManager = Depends(get_db_manager),
+) -> AsyncIterator[UserRepository]:
+    """FastAPI dependency for the user repository.
+
+    The primary and read sessions are opened only if the request uses them,
+    so a lookup never opens a primary session and a create never picks a
+    replica.
+    """
+    users = UserRepository(
+        session_factory=db_manager.get_async_session,
+        read_session_factory=db_manager.get_async_read_session,
+    )
+    try:
+        yield users
+    finally:
+        await users.close()
+
+
+async def get_user_export(
+    db_manager: DatabaseManager = Depends(get_db_manager),
+) -> UserExport:
+    """FastAPI dependency for streaming every user in batches.
+
+    A streamed response outlives the request's dependencies, so the read
+    session is opened when the stream starts and closed when it ends (or
+    the client goes away) rather than by get_async_read_db.
+    """
+    async def export(batch_size: int) -> AsyncIterator[Sequence]:
+        async with db_manager.get_async_read_session() as session:
+            async for rows in UserRepository(session).stream(batch_size):
+                yield rows
+
+    return export
@@ -0,0 +1,375 @@
+"""Response caching for read-heavy routes.
+
+Cached routes keep their serialized response bytes in a bounded in-process
+LRU with TTL and, when enabled, in Redis so workers can share them. Every
+cached response carries an ETag, and ``If-None-Match`` is answered with 304.
+Invalidation is by tag; Redis entries are dropped immediately while other
+workers' in-process copies age out within their TTL. Compressed variants are
+made on first request for each encoding and kept with the in-process entry.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from app.core.compression import compression, is_compressible, mark_encoded
+from app.core.config import Settings, get_settings
+from app.core.response import json_response
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "response-cache"
+
+
+class CachedResponse:
+    """Serialized response body plus what is needed to replay it"""
+
+    __slots__ = ("body", "media_type", "etag", "expires_at", "tags", "encoded")
+
+    def __init__(self, body: bytes, media_type: str, etag: str, expires_at: float, tags: tuple):
+        self.body = body
+        self.media_type = media_type
+        self.etag = etag
+        self.expires_at = expires_at
+        self.tags = tags
+        # Compressed bodies by content encoding
+        self.encoded: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ResponseCache:
+    """Bounded LRU of serialized responses with TTL, tags and an optional Redis tier"""
+
+    def __init__(
+        self,
+        default_ttl: int,
+        max_entries: int,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self.metrics = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "redis_errors": 0,
+            "encodes": 0,
+            "encoded_hits": 0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResponseCache":
+        return cls(
+            default_ttl=settings.RESPONSE_CACHE_TTL,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            redis_url=settings.redis_url if settings.RESPONSE_CACHE_REDIS_ENABLED else None,
+            enabled=settings.RESPONSE_CACHE_ENABLED,
+        )
+
+    @property
+    def redis(self):
+        """Lazily created asyncio Redis client, or None when the tier is off"""
+        if self.redis_url and self._redis is None:
+            import redis.asyncio
+
+            self._redis = redis.asyncio.from_url(self.redis_url)
+        return self._redis
+
+    # In-process tier
+
+    def _get_local(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove_local(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _remove_local(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.metrics["evictions"] += 1
+
+    def _set_local(self, key: str, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_local(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    # Redis tier
+
+    async def _get_redis(self, key: str) -> Optional[CachedResponse]:
+        if self.redis is None:
+            return None
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(f"{REDIS_KEY_PREFIX}:{key}", "body", "media_type", "etag", "tags")
+                pipe.pttl(f"{REDIS_KEY_PREFIX}:{key}")
+                (body, media_type, etag, tags), ttl_ms = await pipe.execute()
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Response cache Redis lookup failed", exc_info=True)
+            return None
+        if body is None or ttl_ms <= 0:
+            return None
+        return CachedResponse(
+            body,
+            media_type.decode(),
+            etag.decode(),
+            time.monotonic() + ttl_ms / 1000,
+            tuple(tag for tag in tags.decode().split(",") if tag),
+        )
+
+    async def _set_redis(self, key: str, entry: CachedResponse, ttl: int):
+        if self.redis is None:
+            return
+        redis_key = f"{REDIS_KEY_PREFIX}:{key}"
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    redis_key,
+                    mapping={
+                        "body": entry.body,
+                        "media_type": entry.media_type,
+                        "etag": entry.etag,
+                        "tags": ",".join(entry.tags),
+                    },
+                )
+                pipe.expire(redis_key, ttl)
+                for tag in entry.tags:
+                    pipe.sadd(f"{REDIS_KEY_PREFIX}-tag:{tag}", redis_key)
+                    pipe.expire(f"{REDIS_KEY_PREFIX}-tag:{tag}", ttl)
+                await pipe.execute()
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Response cache Redis store failed", exc_info=True)
+
+    # Public API
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Look a key up in the in-process tier, then Redis"""
+        entry = self._get_local(key)
+        if entry is not None:
+            self.metrics["hits"] += 1
+            return entry
+        entry = await self._get_redis(key)
+        if entry is not None:
+            self.metrics["redis_hits"] += 1
+            self._set_local(key, entry)
+            return entry
+        self.metrics["misses"] += 1
+        return None
+
+    async def set(self, key: str, body: bytes, media_type: str, ttl: int, tags: tuple = ()) -> CachedResponse:
+        """Store a serialized body in every tier"""
+        entry = CachedResponse(body, media_type, make_etag(body), time.monotonic() + ttl, tags)
+        self._set_local(key, entry)
+        await self._set_redis(key, entry, ttl)
+        self.metrics["stores"] += 1
+        return entry
+
+    async def encoded(self, key: str, entry: CachedResponse, encoding: str) -> bytes:
+        """The entry's body compressed with ``encoding``; compressed once, then kept with the entry"""
+        body = entry.encoded.get(encoding)
+        if body is not None:
+            self.metrics["encoded_hits"] += 1
+            return body
+        body = await compression.compress_async(entry.body, encoding)
+        with self._lock:
+            if encoding not in entry.encoded:
+                entry.encoded[encoding] = body
+                if self._entries.get(key) is entry:
+                    self._bytes += len(body)
+                    self._evict()
+        self.metrics["encodes"] += 1
+        return body
+
+    async def invalidate(self, *tags: str):
+        """Drop every cached response carrying any of the tags"""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if set(entry.tags) & set(tags)]:
+                self._remove_local(key)
+        self.metrics["invalidations"] += 1
+        if self.redis is None:
+            return
+        try:
+            for tag in tags:
+                tag_key = f"{REDIS_KEY_PREFIX}-tag:{tag}"
+                keys = await self.redis.smembers(tag_key)
+                await self.redis.delete(tag_key, *keys)
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Response cache Redis invalidation failed", exc_info=True)
+
+    async def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        self.metrics["invalidations"] += 1
+        if self.redis is None:
+            return
+        try:
+            keys = [key async for key in self.redis.scan_iter(f"{REDIS_KEY_PREFIX}*")]
+            if keys:
+                await self.redis.delete(*keys)
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Response cache Redis clear failed", exc_info=True)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.metrics["hits"] + self.metrics["redis_hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_ratio": round((lookups - self.metrics["misses"]) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "redis_enabled": self.redis_url is not None,
+        }
+
+
+response_cache = ResponseCache.from_settings(get_settings())
+
+
+def cache_key(request: Request) -> str:
+    """Cache key for a request: method, path and query string"""
+    query = request.url.query
+    return f"{request.method}:{request.url.path}?{query}" if query else f"{request.method}:{request.url.path}"
+
+
+async def _replay(key: str, entry: CachedResponse, request: Request, cache_status: str) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+    compressible = (
+        compression.enabled
+        and len(entry.body) >= compression.minimum_size
+        and is_compressible(entry.media_type)
+    )
+    encoding = compression.choose(request.headers.get("accept-encoding")) if compressible else None
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.metrics["not_modified"] += 1
+        if encoding is not None:
+            # Same validator the encoded 200 would carry
+            headers["ETag"] = f"W/{entry.etag}"
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+    # Already encoded, so CompressionMiddleware passes it through
+    response = Response(content=await response_cache.encoded(key, entry, encoding), media_type=entry.media_type, headers=headers)
+    mark_encoded(response.headers, encoding)
+    return response
+
+
+def cached(ttl: Optional[int] = None, tags: Iterable[str] = ()):
+    """Cache a GET route's serialized 200 responses.
+
+    The route may be sync or async and return plain data or a Response; the
+    body is rendered once with the app's JSON engine and replayed as bytes.
+    """
+    tags = tuple(tags)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        inject_request = "request" not in signature.parameters
+        is_coroutine = asyncio.iscoroutinefunction(func)
+
+        async def call_route(*args, **kwargs):
+            if is_coroutine:
+                return await func(*args, **kwargs)
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop("request") if inject_request else kwargs["request"]
+            if not response_cache.enabled:
+                return await call_route(*args, **kwargs)
+
+            key = cache_key(request)
+            entry = await response_cache.get(key)
+            if entry is not None:
+                return await _replay(key, entry, request, "HIT")
+
+            result = await call_route(*args, **kwargs)
+            if isinstance(result, Response):
+                # Only fully rendered 200 responses are replayable
+                if result.status_code != status.HTTP_200_OK or not hasattr(result, "body"):
+                    return result
+            else:
+                result = json_response(jsonable_encoder(result))
+
+            entry = await response_cache.set(
+                key,
+                bytes(result.body),
+                result.media_type or "application/json",
+                ttl or response_cache.default_ttl,
+                tags,
+            )
+            return await _replay(key, entry, request, "MISS")
+
+        if inject_request:
+            request_parameter = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            wrapper.__signature__ = signature.replace(
+                parameters=[*signature.parameters.values(), request_parameter]
+            )
+        return wrapper
+
+    return decorator
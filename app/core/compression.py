@@ -0,0 +1,306 @@
+"""Negotiated response compression.
+
+CompressionMiddleware picks zstd, brotli or gzip from ``Accept-Encoding``.
+It compresses complete bodies once they reach a size threshold, and
+streaming bodies chunk by chunk, each chunk flushed so the client gets it
+right away. brotli and zstd are optional: install ``brotli`` (or
+``brotlicffi``) and ``zstandard`` to offer them. gzip is always available.
+Responses replayed from the response cache arrive already encoded (see
+``ResponseCache.encoded``), so the middleware leaves them alone and the same
+payload is never compressed twice.
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings, get_settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+# Server preference when the client accepts several equally
+SUPPORTED_ENCODINGS = ("zstd", "br", "gzip")
+
+# Bodies above this are compressed on a worker thread; every codec releases the GIL
+THREAD_THRESHOLD = 256 * 1024
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Encodings whose codec is importable, in preference order"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return tuple(encoding for encoding in SUPPORTED_ENCODINGS if installed[encoding])
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str, offered: Tuple[str, ...]) -> Optional[str]:
+    """The offered encoding the client prefers, or None for identity.
+
+    Cached because clients send a handful of distinct header values.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, parameters = part.strip().partition(";")
+        weight = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                weight = float(parameter[2:])
+            except ValueError:
+                continue
+        if name:
+            weights[name.strip()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in offered:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class Compression:
+    """Encoding negotiation and compressors with the configured levels"""
+
+    def __init__(
+        self,
+        minimum_size: int = 1024,
+        encodings: Tuple[str, ...] = SUPPORTED_ENCODINGS,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        enabled: bool = True,
+    ):
+        self.minimum_size = minimum_size
+        self.encodings = tuple(encoding for encoding in encodings if encoding in available_encodings())
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.enabled = enabled and bool(self.encodings)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Compression":
+        return cls(
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            encodings=tuple(filter(None, (part.strip().lower() for part in settings.COMPRESSION_ENCODINGS.split(",")))),
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+            enabled=settings.COMPRESSION_ENABLED,
+        )
+
+    def choose(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Encoding for a request's Accept-Encoding header, or None to send identity"""
+        if not self.enabled or not accept_encoding:
+            return None
+        return negotiate(accept_encoding, self.encodings)
+
+    def compressor(self, encoding: str) -> "StreamCompressor":
+        return StreamCompressor(self, encoding)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress a complete body"""
+        compressor = self.compressor(encoding)
+        return compressor.compress(body) + compressor.finish()
+
+    async def compress_async(self, body: bytes, encoding: str) -> bytes:
+        """Compress a complete body, on a worker thread when it is large"""
+        if len(body) > THREAD_THRESHOLD:
+            return await anyio.to_thread.run_sync(self.compress, body, encoding)
+        return self.compress(body, encoding)
+
+
+class StreamCompressor:
+    """Incremental compressor for one response"""
+
+    def __init__(self, compression: Compression, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=compression.zstd_level).compressobj()
+        elif encoding == "br":
+            self._brotli = brotli.Compressor(quality=compression.brotli_quality)
+        else:
+            # wbits 31: gzip container
+            self._zlib = zlib.compressobj(compression.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.compress(data)
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        """Everything compressed so far, decodable by the client without waiting for the end"""
+        if self.encoding == "zstd":
+            return self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.flush()
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+# Compression configured for this worker process
+compression = Compression.from_settings(get_settings())
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def _weaken_etag(headers: MutableHeaders):
+    # The encoded bytes differ from the identity body a strong ETag describes
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def mark_encoded(headers: MutableHeaders, encoding: str):
+    """Headers for a body sent with ``encoding``"""
+    headers["Content-Encoding"] = encoding
+    _add_vary(headers)
+    _weaken_etag(headers)
+
+
+def _eligible(headers: Headers) -> bool:
+    """Whether a response may be compressed for a client that accepts it"""
+    return (
+        "content-encoding" not in headers
+        and is_compressible(headers.get("content-type", ""))
+        and "no-transform" not in headers.get("cache-control", "")
+    )
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses with the negotiated encoding.
+
+    Complete bodies under ``minimum_size``, types that do not compress,
+    responses that are already encoded and ``Cache-Control: no-transform``
+    responses pass through untouched. Streaming bodies are compressed as
+    they are sent. Every response that could have been compressed carries
+    ``Vary: Accept-Encoding``, whether or not it was, so shared caches keep
+    the identity and encoded variants apart.
+    """
+
+    def __init__(self, app: ASGIApp, compression: Compression = compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.compression.enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        if scope["method"] != "HEAD":
+            encoding = self.compression.choose(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, self._send_identity(send))
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if not _eligible(Headers(raw=message.get("headers", []))):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if not more_body:
+                    # Complete body: compress once if it is worth it
+                    if len(body) < self.compression.minimum_size:
+                        passthrough = True
+                        _add_vary(headers)
+                        await send(start)
+                        await send(message)
+                        return
+                    body = await self.compression.compress_async(body, encoding)
+                    mark_encoded(headers, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # Streaming body: length unknown, compress as it goes
+                compressor = self.compression.compressor(encoding)
+                mark_encoded(headers, encoding)
+                del headers["Content-Length"]
+                await send(start)
+
+            if more_body:
+                chunk = compressor.compress(body) + compressor.flush() if body else b""
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.compress(body) + compressor.finish()})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _send_identity(send: Send) -> Send:
+        """``send`` for a response that goes out uncompressed, marking it as varying when it could have been"""
+
+        async def send_identity(message: Message):
+            if message["type"] == "http.response.start" and _eligible(Headers(raw=message.setdefault("headers", []))):
+                _add_vary(MutableHeaders(scope=message))
+            await send(message)
+
+        return send_identity
@@ -1,5 +1,9 @@
+import logging
+import threading
+import time
 from enum import Enum
-from typing import Optional
+from functools import cached_property
+from typing import Callable, List, Optional
 
 from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings
@@ -15,6 +19,32 @@ class LogLevel(Enum):
     WARNING = "warning"
     ERROR = "error"
 
+class LogRotation(Enum):
+    SIZE = "size"
+    TIME = "time"
+
+class HashExecutor(Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+class StartupMode(Enum):
+    EAGER = "eager"
+    LAZY = "lazy"
+
+class ReplicaBalancing(Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_CONNECTIONS = "least_connections"
+
+class EmailSecurity(Enum):
+    NONE = "none"
+    STARTTLS = "starttls"
+    TLS = "tls"
+
+class JSONEngine(Enum):
+    PYDANTIC = "pydantic"
+    ORJSON = "orjson"
+    STDLIB = "stdlib"
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables and .env file"""
     
@@ -54,32 +84,202 @@ class Settings(BaseSettings):
     EMAIL_HOST: str = Field(description="Email SMTP host")
     EMAIL_PORT: int = Field(description="Email SMTP port")
     
+    # Log Output Settings - optional tuning
+    LOG_FILE: str = Field(default="app.log", description="Log file path")
+    LOG_ROTATION: LogRotation = Field(default=LogRotation.SIZE, description="Rotate the log file by size or time")
+    LOG_MAX_BYTES: int = Field(default=10 * 1024 * 1024, description="Log file size that triggers rotation")
+    LOG_ROTATE_WHEN: str = Field(default="midnight", description="Rotation interval for time-based rotation")
+    LOG_BACKUP_COUNT: int = Field(default=5, description="Rotated log files to keep")
+    LOG_JSON: bool = Field(default=False, description="Emit structured JSON log lines")
+    LOG_QUEUE_SIZE: int = Field(default=10_000, description="Records buffered before new ones are dropped")
+    LOG_BATCH_SIZE: int = Field(default=256, description="Most records written per flush")
+    
+    # Database Pool Settings - optional tuning (per engine, per worker)
+    DB_POOL_SIZE: int = Field(default=5, description="Connections kept open in each pool")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Extra connections allowed above the pool size")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a pooled connection")
+    DB_POOL_RECYCLE: int = Field(default=3600, description="Seconds before a connection is replaced")
+    DB_POOL_PRE_PING: bool = Field(default=True, description="Test connections on checkout")
+    DB_POOL_USE_LIFO: bool = Field(default=False, description="Reuse the most recent connection first")
+    DB_ECHO: Optional[bool] = Field(default=None, description="Log SQL queries (defaults to on in local)")
+    DB_POOL_WARM_CONNECTIONS: Optional[int] = Field(default=None, description="Connections opened at startup (defaults to DB_POOL_SIZE, capped at it)")
+    DB_DISPOSE_TIMEOUT: float = Field(default=5.0, description="Seconds to wait for engines to close their connections on shutdown")
+    
+    # Statement Cache Settings - optional tuning (per engine, per worker)
+    DB_QUERY_CACHE_SIZE: int = Field(default=500, description="Compiled SQL statements kept by each engine")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, description="Prepared statements kept by each asyncpg connection")
+    DB_TRANSACTION_POOLER: bool = Field(default=False, description="Connect through a transaction-mode pooler such as PgBouncer: no statement stays prepared between queries")
+    
+    # Read Replica Settings - optional tuning (replicas share the primary's credentials and database)
+    DB_READ_REPLICAS: str = Field(default="", description="Comma-separated host[:port] of read replicas")
+    DB_REPLICA_BALANCING: ReplicaBalancing = Field(default=ReplicaBalancing.ROUND_ROBIN, description="Spread reads round-robin or to the replica with the fewest connections in use")
+    DB_REPLICA_MAX_LAG: float = Field(default=5.0, description="Seconds of replication lag before a replica stops receiving reads")
+    DB_REPLICA_CHECK_INTERVAL: float = Field(default=5.0, description="Seconds between replica lag checks")
+    
+    # Rate Limiting Settings - optional tuning
+    RATE_LIMIT_STORAGE_URI: Optional[str] = Field(default=None, description="Rate limit storage (defaults to memory in local, Redis elsewhere)")
+    RATE_LIMIT_LEASE_SIZE: int = Field(default=20, description="Most tokens a worker leases from Redis at once")
+    RATE_LIMIT_LEASE_FRACTION: float = Field(default=0.05, description="Largest share of a limit a single lease may take")
+    
+    # Bulk User Import Settings - optional tuning
+    USERS_BULK_BATCH_SIZE: int = Field(default=1000, description="Users written per multi-row INSERT")
+    USERS_BULK_HASH_CHUNK_SIZE: int = Field(default=25, description="Passwords hashed per password hasher job during bulk imports")
+    USERS_BULK_MAX_RECORDS: int = Field(default=10_000, description="Most records accepted per bulk request")
+    USERS_BULK_RATE_LIMIT: str = Field(default="10000/hour", description="Bulk records each client may submit")
+    USERS_BULK_MAX_BODY_BYTES: int = Field(default=4 * 1024 * 1024, description="Largest bulk request body accepted")
+    USERS_BULK_MAX_LINE_BYTES: int = Field(default=16 * 1024, description="Longest NDJSON line accepted as a record")
+    
+    # User Export Settings - optional tuning
+    USERS_EXPORT_BATCH_SIZE: int = Field(default=1000, description="Rows fetched from the server-side cursor per streamed chunk")
+    
+    # Validation Settings - optional tuning
+    VALIDATION_FIRST_ERROR: bool = Field(default=False, description="Stop validating a user payload at its first error")
+    VALIDATION_MAX_ERRORS: int = Field(default=20, description="Most validation errors reported in a 422 response")
+    VALIDATION_MAX_MESSAGE_LENGTH: int = Field(default=200, description="Longest message reported per field in a 422 response")
+    
+    # Password Hashing Settings - optional tuning (cost parameters follow ENVIRONMENT)
+    PASSWORD_HASH_WORKERS: int = Field(default=2, description="Password hashes run concurrently per worker")
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(default=16, description="Hashes allowed to wait before new ones are rejected")
+    PASSWORD_HASH_EXECUTOR: HashExecutor = Field(default=HashExecutor.THREAD, description="Run hashes on a thread or process pool")
+    
+    # Email Delivery Settings - optional tuning (uses EMAIL_HOST and EMAIL_PORT)
+    EMAIL_ENABLED: bool = Field(default=False, description="Queue and send application email such as welcome emails")
+    EMAIL_FROM: str = Field(default="noreply@localhost", description="Sender address")
+    EMAIL_USERNAME: Optional[str] = Field(default=None, description="SMTP username (no login when unset)")
+    EMAIL_PASSWORD: Optional[str] = Field(default=None, description="SMTP password")
+    EMAIL_SECURITY: EmailSecurity = Field(default=EmailSecurity.NONE, description="Plain SMTP, STARTTLS or implicit TLS")
+    EMAIL_TIMEOUT: float = Field(default=10.0, description="Seconds before an SMTP connect or command times out")
+    EMAIL_WORKERS: int = Field(default=2, description="Delivery workers, each with its own SMTP connection, per worker process")
+    EMAIL_BATCH_SIZE: int = Field(default=20, description="Most queued messages a worker sends per connection round")
+    EMAIL_QUEUE_SIZE: int = Field(default=1000, description="Most messages waiting in the in-process queue")
+    EMAIL_MAX_ATTEMPTS: int = Field(default=5, description="Delivery attempts before a message is dropped")
+    EMAIL_RETRY_BACKOFF: float = Field(default=2.0, description="Seconds before the first retry; doubles with every attempt")
+    EMAIL_CONNECTION_IDLE_TIMEOUT: float = Field(default=30.0, description="Seconds an idle SMTP connection is reused before reconnecting")
+    EMAIL_QUEUE_REDIS_ENABLED: bool = Field(default=False, description="Keep queued messages in Redis so they survive restarts")
+    EMAIL_DRAIN_TIMEOUT: float = Field(default=10.0, description="Seconds shutdown waits for queued messages to be sent")
+    
+    # Threadpool Settings - optional tuning
+    THREADPOOL_SIZE: int = Field(default=40, description="Threads for sync endpoints and dependencies per worker")
+    
+    # Startup and Shutdown Settings - optional tuning
+    STARTUP_MODE: StartupMode = Field(default=StartupMode.EAGER, description="Load routers and the database layer at import (eager) or in a background warm-up (lazy)")
+    SHUTDOWN_DRAIN_TIMEOUT: float = Field(default=10.0, description="Seconds to wait for in-flight requests before closing connections")
+    
+    # Settings Reload - optional tuning
+    SETTINGS_RELOAD_ON_SIGHUP: bool = Field(default=True, description="Reload settings when the worker receives SIGHUP")
+    SETTINGS_WATCH_INTERVAL: float = Field(default=0.0, description="Seconds between env file change checks (0 disables)")
+    
+    # Health Check Settings - optional tuning
+    HEALTH_CHECK_INTERVAL: float = Field(default=10.0, description="Seconds between background dependency probes")
+    HEALTH_CHECK_TIMEOUT: float = Field(default=2.0, description="Seconds before a dependency probe fails")
+    
+    # Response Cache Settings - optional tuning
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True, description="Cache responses of cacheable routes")
+    RESPONSE_CACHE_TTL: int = Field(default=30, description="Default seconds a cached response stays fresh")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1024, description="Most responses kept in the in-process cache")
+    RESPONSE_CACHE_MAX_BYTES: int = Field(default=32 * 1024 * 1024, description="Most body bytes kept in the in-process cache")
+    RESPONSE_CACHE_REDIS_ENABLED: bool = Field(default=False, description="Share cached responses between workers through Redis")
+    
+    # Idempotency Settings - optional tuning
+    IDEMPOTENCY_ENABLED: bool = Field(default=True, description="Honour Idempotency-Key headers on routes that support them")
+    IDEMPOTENCY_TTL: int = Field(default=86400, description="Seconds a stored response is replayed for its key")
+    IDEMPOTENCY_MAX_ENTRIES: int = Field(default=10_000, description="Most responses kept in the in-process idempotency cache")
+    IDEMPOTENCY_MAX_BYTES: int = Field(default=16 * 1024 * 1024, description="Most body bytes kept in the in-process idempotency cache")
+    IDEMPOTENCY_REDIS_ENABLED: bool = Field(default=False, description="Share stored responses and in-flight keys between workers through Redis")
+    IDEMPOTENCY_LOCK_TTL: int = Field(default=30, description="Seconds a worker holds a key in Redis while running its request")
+    IDEMPOTENCY_WAIT_TIMEOUT: float = Field(default=10.0, description="Seconds a duplicate waits for the in-flight request before getting 409")
+    
+    # Compression Settings - optional tuning (br needs brotli, zstd needs zstandard)
+    COMPRESSION_ENABLED: bool = Field(default=True, description="Compress responses for clients that accept it")
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024, description="Smallest complete body, in bytes, that is compressed")
+    COMPRESSION_ENCODINGS: str = Field(default="zstd,br,gzip", description="Comma-separated encodings to offer, most preferred first")
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6, description="gzip level (1-9)")
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=4, description="brotli quality (0-11)")
+    COMPRESSION_ZSTD_LEVEL: int = Field(default=3, description="zstd level (1-22)")
+    
+    # Metrics Settings - optional tuning
+    METRICS_ENABLED: bool = Field(default=True, description="Record request metrics and serve them at /metrics")
+    METRICS_TOKEN: Optional[str] = Field(default=None, description="Bearer token required by /metrics (open without one only in local)")
+    SERVER_TIMING: Optional[bool] = Field(default=None, description="Add Server-Timing headers to responses (defaults to on in local)")
+    
+    # Profiling Settings - optional tuning (off unless enabled)
+    PROFILING_ENABLED: bool = Field(default=False, description="Serve the sampling profiler endpoint")
+    PROFILING_TOKEN: Optional[str] = Field(default=None, description="Bearer token required by the profiler endpoint")
+    PROFILING_MAX_SECONDS: float = Field(default=60.0, description="Longest profile a single request may run")
+    
+    # Response Settings - optional tuning
+    JSON_RESPONSE_ENGINE: JSONEngine = Field(default=JSONEngine.PYDANTIC, description="JSON serializer for responses")
+    
+    # Derived values are computed on first access and then cached on the
+    # instance; a reload builds a new Settings rather than mutating this one
+    
     @computed_field
-    @property
+    @cached_property
     def database_url_sync(self) -> str:
         """Synchronous database URL"""
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
     @computed_field
-    @property
+    @cached_property
     def database_url_async(self) -> str:
         """Asynchronous database URL"""
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
     @computed_field
-    @property
+    @cached_property
+    def database_replica_urls_async(self) -> List[str]:
+        """Asynchronous database URLs of the read replicas"""
+        urls = []
+        for address in filter(None, (part.strip() for part in self.DB_READ_REPLICAS.split(","))):
+            host, _, port = address.partition(":")
+            urls.append(f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{host}:{port or self.POSTGRES_PORT}/{self.POSTGRES_DB}")
+        return urls
+    
+    @computed_field
+    @cached_property
     def redis_url(self) -> str:
         """Redis connection URL"""
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
     
     @computed_field
-    @property
+    @cached_property
+    def redis_in_use(self) -> bool:
+        """Whether any component is configured to use Redis"""
+        return (
+            "redis" in self.rate_limit_storage_uri.split("://", 1)[0]
+            or self.RESPONSE_CACHE_REDIS_ENABLED
+            or self.IDEMPOTENCY_REDIS_ENABLED
+            or (self.EMAIL_ENABLED and self.EMAIL_QUEUE_REDIS_ENABLED)
+        )
+    
+    @computed_field
+    @cached_property
+    def database_echo(self) -> bool:
+        """Whether SQL queries are logged"""
+        return self.is_development if self.DB_ECHO is None else self.DB_ECHO
+    
+    @computed_field
+    @cached_property
+    def server_timing_enabled(self) -> bool:
+        """Whether responses carry Server-Timing headers"""
+        return self.is_development if self.SERVER_TIMING is None else self.SERVER_TIMING
+    
+    @computed_field
+    @cached_property
+    def rate_limit_storage_uri(self) -> str:
+        """Storage URI for the rate limiter"""
+        if self.RATE_LIMIT_STORAGE_URI:
+            return self.RATE_LIMIT_STORAGE_URI
+        return "memory://" if self.is_development else f"lease+{self.redis_url}"
+    
+    @computed_field
+    @cached_property
     def is_development(self) -> bool:
         """Check if running in development environment"""
         return self.ENVIRONMENT == EnvironmentOption.LOCAL
     
     @computed_field
-    @property
+    @cached_property
     def is_production(self) -> bool:
         """Check if running in production environment"""
         return self.ENVIRONMENT == EnvironmentOption.PRODUCTION
@@ -91,5 +291,55 @@ class Settings(BaseSettings):
         # Tell Pydantic to read from environment variables
         env_prefix = ""  # No prefix, use exact variable names
 
-# Create settings instance that will load from environment/env file
-settings = Settings()
\ No newline at end of file
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsProvider:
+    """Process-wide Settings, built once on first use and swapped on reload"""
+
+    def __init__(self, factory: Callable[[], Settings] = Settings):
+        self.factory = factory
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._settings: Optional[Settings] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Settings:
+        settings = self._settings
+        if settings is None:
+            with self._lock:
+                if self._settings is None:
+                    self._settings = self.factory()
+                    self.loaded_at = time.time()
+                settings = self._settings
+        return settings
+
+    def reload(self) -> Optional[Settings]:
+        """Re-read the environment and env file.
+
+        Returns the new Settings, or None (keeping the current ones) when the
+        new values do not validate.
+        """
+        try:
+            settings = self.factory()
+        except Exception:
+            self.failed_reloads += 1
+            logger.exception("Settings reload failed; keeping the current settings")
+            return None
+
+        with self._lock:
+            self._settings = settings
+            self.loaded_at = time.time()
+            self.reloads += 1
+        logger.info("Settings reloaded")
+        return settings
+
+
+settings_provider = SettingsProvider()
+
+
+def get_settings() -> Settings:
+    """The current application settings (constructed on first call)"""
+    return settings_provider.get()
\ No newline at end of file
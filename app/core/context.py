@@ -0,0 +1,159 @@
+"""Per-request context exposed through a pure ASGI middleware"""
+
+import asyncio
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings
+
+if TYPE_CHECKING:
+    from app.core.db.database import DatabaseManager
+
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client-supplied ids are echoed in the response and written to every log
+# line of the request, so anything else is replaced by a fresh id
+VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._-]{1,128}")
+
+
+class RequestContext:
+    """Settings, database manager and metadata for the request being served"""
+
+    __slots__ = ("settings", "db_manager", "request_id", "method", "path", "started_at", "db_queries", "db_seconds")
+
+    def __init__(
+        self,
+        settings: Settings,
+        db_manager: Optional["DatabaseManager"],
+        request_id: str,
+        method: str,
+        path: str,
+    ):
+        self.settings = settings
+        self.db_manager = db_manager
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started_at = time.perf_counter()
+        # Filled in by the SQLAlchemy hooks in app.core.metrics
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent on this request so far"""
+        return time.perf_counter() - self.started_at
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> RequestContext:
+    """Get the context of the request currently being served"""
+    context = _request_context.get()
+    if context is None:
+        raise RuntimeError("No request context. Is RequestContextMiddleware installed?")
+    return context
+
+
+def current_request_context() -> Optional[RequestContext]:
+    """Context of the request currently being served, or None outside a request"""
+    return _request_context.get()
+
+
+def current_request_id() -> Optional[str]:
+    """Id of the request currently being served, if any"""
+    context = _request_context.get()
+    return context.request_id if context is not None else None
+
+
+class InFlightRequests:
+    """Counts HTTP requests being served so shutdown can wait for them"""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self):
+        self.count += 1
+        self._idle.clear()
+
+    def exit(self):
+        self.count -= 1
+        if self.count == 0:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no request is in flight; False if ``timeout`` expired first"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+# Requests being served by this worker
+in_flight = InFlightRequests()
+
+
+def _request_id_from(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            if VALID_REQUEST_ID.fullmatch(value):
+                return value.decode("ascii")
+            break
+    return uuid.uuid4().hex
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware that publishes the request context.
+
+    Settings and the database manager are copied into ``scope["state"]`` so
+    ``request.state`` keeps working, and into a context variable for code that
+    has no access to the request. The response body is never proxied; only the
+    ``http.response.start`` message is touched to echo the request id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_state = scope["app"].state
+        context = RequestContext(
+            settings=app_state.settings,
+            # Absent until a lazy startup has loaded the database layer
+            db_manager=getattr(app_state, "db_manager", None),
+            request_id=_request_id_from(scope),
+            method=scope["method"],
+            path=scope["path"],
+        )
+
+        state = scope.setdefault("state", {})
+        state["settings"] = context.settings
+        state["db_manager"] = context.db_manager
+        state["request_id"] = context.request_id
+
+        request_id_header = (REQUEST_ID_HEADER, context.request_id.encode("latin-1"))
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), request_id_header]
+            await send(message)
+
+        token = _request_context.set(context)
+        in_flight.enter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            in_flight.exit()
+            _request_context.reset(token)
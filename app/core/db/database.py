@@ -1,15 +1,27 @@
 """Database configuration and connection management"""
 
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Callable, Iterator, Optional, Tuple
+from weakref import WeakKeyDictionary
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.core.config import Settings
+from app.core.db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.core.db.replicas import ReplicaSet
+from app.core.db.statements import StatementCacheStats, asyncpg_connect_args
 
 # Base class for all ORM models
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 class DatabaseManager:
     """Database connection manager using settings"""
     
@@ -19,6 +31,38 @@ class DatabaseManager:
         self._async_engine = None
         self._sync_session_factory = None
         self._async_session_factory = None
+        self._replicas = None
+        # Statement cache counters of each engine, dropped with the engine
+        self._statement_stats: "WeakKeyDictionary[Engine, StatementCacheStats]" = WeakKeyDictionary()
+    
+    def _engine_options(self, poolclass) -> dict:
+        """Engine and pool keyword arguments from settings"""
+        return {
+            "echo": self.settings.database_echo,
+            "poolclass": poolclass,
+            "pool_size": self.settings.DB_POOL_SIZE,
+            "max_overflow": self.settings.DB_MAX_OVERFLOW,
+            "pool_timeout": self.settings.DB_POOL_TIMEOUT,
+            "pool_recycle": self.settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.settings.DB_POOL_PRE_PING,
+            "pool_use_lifo": self.settings.DB_POOL_USE_LIFO,
+            "query_cache_size": self.settings.DB_QUERY_CACHE_SIZE,
+        }
+    
+    def _create_async_engine(self, url: str) -> AsyncEngine:
+        """Async engine for ``url``; with asyncpg, prepared statements are cached per DB_STATEMENT_CACHE_SIZE"""
+        options = self._engine_options(TimedAsyncAdaptedQueuePool)
+        if make_url(url).get_driver_name() == "asyncpg":
+            transaction_pooler = self.settings.DB_TRANSACTION_POOLER
+            cache_size = 0 if transaction_pooler else self.settings.DB_STATEMENT_CACHE_SIZE
+            stats = StatementCacheStats(prepared_statements=True, cache_size=cache_size)
+            options["connect_args"] = asyncpg_connect_args(stats, cache_size, transaction_pooler)
+        else:
+            stats = StatementCacheStats()
+        engine = create_async_engine(url, **options)
+        stats.install(engine.sync_engine)
+        self._statement_stats[engine.sync_engine] = stats
+        return engine
     
     @property
     def sync_engine(self):
@@ -26,24 +70,106 @@ class DatabaseManager:
         if self._sync_engine is None:
             self._sync_engine = create_engine(
                 self.settings.database_url_sync,
-                echo=self.settings.is_development,  # Log SQL queries in development
-                pool_pre_ping=True,
-                pool_recycle=3600,
+                **self._engine_options(TimedQueuePool),
             )
+            stats = StatementCacheStats()
+            stats.install(self._sync_engine)
+            self._statement_stats[self._sync_engine] = stats
         return self._sync_engine
     
     @property
     def async_engine(self):
         """Get or create asynchronous database engine"""
         if self._async_engine is None:
-            self._async_engine = create_async_engine(
-                self.settings.database_url_async,
-                echo=self.settings.is_development,  # Log SQL queries in development
-                pool_pre_ping=True,
-                pool_recycle=3600,
-            )
+            self._async_engine = self._create_async_engine(self.settings.database_url_async)
         return self._async_engine
     
+    @property
+    def replicas(self) -> ReplicaSet:
+        """Get or create the read replica engines (empty without DB_READ_REPLICAS)"""
+        if self._replicas is None:
+            self._replicas = ReplicaSet(
+                [
+                    self._create_async_engine(url)
+                    for url in self.settings.database_replica_urls_async
+                ],
+                balancing=self.settings.DB_REPLICA_BALANCING,
+                max_lag=self.settings.DB_REPLICA_MAX_LAG,
+                check_interval=self.settings.DB_REPLICA_CHECK_INTERVAL,
+                check_timeout=self.settings.HEALTH_CHECK_TIMEOUT,
+            )
+        return self._replicas
+    
+    def read_engine(self):
+        """Async engine for a read: an available replica, else the primary"""
+        return self.replicas.choose() or self.async_engine
+    
+    def _created_engines(self) -> Iterator[Tuple[str, Engine]]:
+        """Name and (sync) Engine of each engine that has been created"""
+        if self._sync_engine is not None:
+            yield "sync", self._sync_engine
+        if self._async_engine is not None:
+            yield "async", self._async_engine.sync_engine
+        if self._replicas:
+            for replica in self._replicas.replicas:
+                yield f"replica {replica.name}", replica.engine.sync_engine
+    
+    def pool_status(self) -> dict:
+        """Live pool statistics for engines that have been created"""
+        return {name: engine.pool.status_snapshot() for name, engine in self._created_engines()}
+    
+    def statement_cache_status(self) -> dict:
+        """Compiled query cache and prepared statement hit rates for engines that have been created"""
+        return {name: self._statement_stats[engine].snapshot(engine) for name, engine in self._created_engines()}
+    
+    async def warm_up(self, connections: Optional[int] = None, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Open pooled connections on the primary and each replica ahead of the first requests.
+
+        Connections are opened one after another, so a rolling deploy of many
+        workers does not hit the database with a burst of simultaneous
+        connects, and all are held until the last one is open so each is a
+        distinct connection that then stays in the pool. Returns how many
+        were opened.
+        """
+        pool_size = self.settings.DB_POOL_SIZE
+        per_engine = pool_size if connections is None else max(0, min(connections, pool_size))
+        engines = [self.async_engine, *(replica.engine for replica in self.replicas.replicas)]
+        target = per_engine * len(engines)
+        opened = 0
+        for engine in engines:
+            async with AsyncExitStack() as held:
+                for _ in range(per_engine):
+                    await held.enter_async_context(engine.connect())
+                    opened += 1
+                    if progress is not None:
+                        progress(opened, target)
+        return opened
+    
+    async def dispose(self, timeout: Optional[float] = None):
+        """Close every pooled connection of every engine, giving up after ``timeout`` seconds each"""
+        if self._async_engine is not None:
+            try:
+                await asyncio.wait_for(self._async_engine.dispose(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Async engine did not close its connections within {timeout}s")
+            self._async_engine = None
+            self._async_session_factory = None
+        if self._sync_engine is not None:
+            try:
+                await asyncio.wait_for(asyncio.to_thread(self._sync_engine.dispose), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Sync engine did not close its connections within {timeout}s")
+            self._sync_engine = None
+            self._sync_session_factory = None
+        if self._replicas is not None:
+            await self._replicas.stop()
+            for replica in self._replicas.replicas:
+                try:
+                    await asyncio.wait_for(replica.engine.dispose(), timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Replica {replica.name} did not close its connections within {timeout}s")
+            self._replicas = None
+    
     @property
     def sync_session_factory(self):
         """Get or create synchronous session factory"""
@@ -76,6 +202,14 @@ class DatabaseManager:
         """Get an asynchronous database session"""
         return self.async_session_factory()
     
+    def get_async_read_session(self):
+        """Get an asynchronous session for reads, bound to a replica when one is available.
+
+        Replicas may lag behind the primary (up to DB_REPLICA_MAX_LAG), so
+        reads that must see the request's own writes use get_async_session.
+        """
+        return self.async_session_factory(bind=self.read_engine())
+    
     async def create_tables(self):
         """Create all database tables"""
         async with self.async_engine.begin() as conn:
@@ -113,4 +247,9 @@ def get_sync_db():
 async def get_async_db():
     """FastAPI dependency for asynchronous database sessions"""
     async with get_db_manager().get_async_session() as db:
-        yield db
\ No newline at end of file
+        yield db
+
+async def get_async_read_db():
+    """FastAPI dependency for asynchronous read-only sessions (replica when available)"""
+    async with get_db_manager().get_async_read_session() as db:
+        yield db
@@ -0,0 +1,98 @@
+"""Connection pool classes that record checkout telemetry"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Upper bounds (milliseconds) of the checkout latency histogram buckets
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Checkout counters and latency histogram shared by a pool and its recreations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float, timed_out: bool = False):
+        """Record one checkout attempt"""
+        index = bisect_left(CHECKOUT_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += seconds
+            if seconds > self.max_wait:
+                self.max_wait = seconds
+            self.buckets[index] += 1
+
+    def snapshot(self) -> dict:
+        """Counters and histogram as plain data"""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(CHECKOUT_BUCKETS_MS, self.buckets)
+            }
+            histogram["le_inf"] = self.buckets[-1]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "checkout_latency_histogram": histogram,
+            }
+
+
+class _TimedPoolMixin:
+    """Times every ``connect()`` (queue wait, connect and pre-ping) into ``self.stats``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Keep counting across engine.dispose()
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def status_snapshot(self) -> dict:
+        """Live pool gauges plus accumulated checkout telemetry"""
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self.timeout(),
+            **self.stats.snapshot(),
+        }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool with checkout telemetry"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout telemetry"""
@@ -0,0 +1,159 @@
+"""Read replica selection with replication lag awareness.
+
+Reads are spread across replicas round-robin or to the replica with the fewest
+checked-out connections. A replica is skipped while its last check failed or
+reported more lag than allowed; with no replica left, reads go to the primary.
+Lag is checked in the background on a fixed interval, so choosing a replica
+never waits on the network.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import ReplicaBalancing
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; 0 when everything received has been replayed,
+# so an idle primary does not make its replicas look stale
+REPLICATION_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """A replica engine and the result of its last lag check"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        url = engine.url
+        self.name = f"{url.host}:{url.port}" if url.host else url.database
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.sessions = 0
+
+    @property
+    def in_use(self) -> int:
+        """Connections currently checked out of this replica's pool"""
+        return self.engine.pool.checkedout()
+
+    def status(self, max_lag: float) -> dict:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "available": self.available(max_lag),
+            "in_use": self.in_use,
+            "sessions": self.sessions,
+            "checked_at": self.checked_at,
+            "error": self.error,
+        }
+
+    def available(self, max_lag: float) -> bool:
+        # Not checked yet counts as available; startup runs a check before serving
+        return self.healthy and (self.lag is None or self.lag <= max_lag)
+
+
+class ReplicaSet:
+    """Chooses a replica for each read and keeps replica lag up to date"""
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        balancing: ReplicaBalancing = ReplicaBalancing.ROUND_ROBIN,
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        check_timeout: float = 2.0,
+    ):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.balancing = balancing
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.primary_fallbacks = 0
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Engine for the next read, or None to use the primary"""
+        if not self.replicas:
+            return None
+        candidates = [replica for replica in self.replicas if replica.available(self.max_lag)]
+        if not candidates:
+            self.primary_fallbacks += 1
+            return None
+        if self.balancing == ReplicaBalancing.LEAST_CONNECTIONS:
+            replica = min(candidates, key=lambda candidate: candidate.in_use)
+        else:
+            replica = candidates[next(self._turn) % len(candidates)]
+        replica.sessions += 1
+        return replica.engine
+
+    async def _check(self, replica: Replica):
+        async with replica.engine.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                lag = (await connection.execute(REPLICATION_LAG_QUERY)).scalar_one()
+            else:
+                lag = 0.0
+        replica.lag = float(lag)
+
+    async def check(self):
+        """Measure every replica's lag concurrently"""
+        async def check_one(replica: Replica):
+            was_available = replica.available(self.max_lag)
+            try:
+                await asyncio.wait_for(self._check(replica), timeout=self.check_timeout)
+            except asyncio.TimeoutError:
+                replica.healthy, replica.error = False, f"timed out after {self.check_timeout}s"
+            except Exception as exc:
+                replica.healthy, replica.error = False, f"{type(exc).__name__}: {exc}"
+            else:
+                replica.healthy, replica.error = True, None
+            replica.checked_at = time.time()
+            if replica.available(self.max_lag) != was_available:
+                if was_available:
+                    logger.warning(f"Replica {replica.name} taken out of rotation: {replica.error or f'lag {replica.lag:.1f}s'}")
+                else:
+                    logger.info(f"Replica {replica.name} back in rotation")
+
+        await asyncio.gather(*(check_one(replica) for replica in self.replicas))
+
+    async def _check_forever(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def start(self):
+        """Start checking lag in the background"""
+        if self.replicas and self.check_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._check_forever())
+
+    async def stop(self):
+        """Stop the background checks"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "balancing": self.balancing.value,
+            "max_lag_seconds": self.max_lag,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": {replica.name: replica.status(self.max_lag) for replica in self.replicas},
+        }
@@ -0,0 +1,122 @@
+"""Compiled-query and prepared-statement caching.
+
+SQLAlchemy compiles each distinct statement shape once per engine and keeps
+the SQL in the engine's compiled cache (DB_QUERY_CACHE_SIZE entries). With
+asyncpg, every connection also keeps the server-side prepared statements for
+the SQL it has run (DB_STATEMENT_CACHE_SIZE per connection), so a repeated
+query skips PostgreSQL's parse and plan. StatementCacheStats counts hits on
+both per engine, so the hit rates can be checked rather than assumed.
+"""
+
+import threading
+import uuid
+from functools import cache
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+
+
+Statement = TypeVar("Statement")
+
+
+def hot_query(build: Callable[[], Statement]) -> Callable[[], Statement]:
+    """Build a statement on first use and return the same object afterwards.
+
+    A statement object memoizes its cache key, so reusing one skips both
+    construction and cache key generation, and it always finds its compiled
+    form in the engine's cache. Values are passed as ``bindparam()`` at
+    execution time, keeping the SQL (and so the prepared statement) identical.
+    """
+    return cache(build)
+
+
+def asyncpg_connect_args(stats: "StatementCacheStats", cache_size: int, transaction_pooler: bool = False) -> dict:
+    """``connect_args`` for SQLAlchemy's asyncpg dialect.
+
+    Behind a transaction-mode pooler (PgBouncer with ``pool_mode =
+    transaction``) consecutive transactions may run on different server
+    connections, where a statement prepared earlier does not exist. Nothing
+    is cached then, neither by SQLAlchemy nor by asyncpg, and each statement
+    is prepared under a unique name so two clients sharing a server
+    connection never collide.
+    """
+    if transaction_pooler:
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": stats.statement_name,
+        }
+    return {
+        "prepared_statement_cache_size": cache_size,
+        "prepared_statement_name_func": stats.statement_name,
+    }
+
+
+def _ratio(hits: int, total: int) -> Optional[float]:
+    return round(hits / total, 4) if total else None
+
+
+class StatementCacheStats:
+    """Compiled cache lookups and server-side prepares of one engine"""
+
+    def __init__(self, prepared_statements: bool = False, cache_size: int = 0):
+        self._lock = threading.Lock()
+        # Whether the driver prepares statements (asyncpg) and how many each connection keeps
+        self.prepared_statements = prepared_statements
+        self.cache_size = cache_size
+        self.executions = 0
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.uncached = 0
+        self.prepares = 0
+
+    def statement_name(self) -> str:
+        """asyncpg ``prepared_statement_name_func``: called once per statement actually prepared"""
+        with self._lock:
+            self.prepares += 1
+        return f"__asyncpg_{uuid.uuid4()}__"
+
+    def install(self, engine: Engine):
+        """Count the executions of ``engine`` (the ``sync_engine`` of an async engine)"""
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, "cache_hit", None)
+        with self._lock:
+            if not executemany:
+                # executemany goes through asyncpg's own statement cache, not a named prepare
+                self.executions += 1
+            if cache_hit is CacheStats.CACHE_HIT:
+                self.compiled_hits += 1
+            elif cache_hit is CacheStats.CACHE_MISS:
+                self.compiled_misses += 1
+            else:
+                self.uncached += 1
+
+    def snapshot(self, engine: Engine) -> dict:
+        """Counters and hit ratios as plain data"""
+        compiled_cache = engine._compiled_cache
+        with self._lock:
+            lookups = self.compiled_hits + self.compiled_misses
+            status = {
+                "compiled_cache": {
+                    "entries": len(compiled_cache) if compiled_cache is not None else 0,
+                    "capacity": compiled_cache.capacity if compiled_cache is not None else 0,
+                    "hits": self.compiled_hits,
+                    "misses": self.compiled_misses,
+                    "uncached": self.uncached,
+                    "hit_ratio": _ratio(self.compiled_hits, lookups),
+                },
+                "prepared_statements": None,
+            }
+            if self.prepared_statements:
+                reused = max(0, self.executions - self.prepares)
+                status["prepared_statements"] = {
+                    "cache_size_per_connection": self.cache_size,
+                    "executions": self.executions,
+                    "prepared": self.prepares,
+                    "hit_ratio": _ratio(reused, self.executions),
+                }
+            return status
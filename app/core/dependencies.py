@@ -1,24 +1,79 @@
 """Dependencies for accessing application settings and services"""
 
-from fastapi import Depends, Request
-from app.core.config import Settings
-from app.core.db.database import DatabaseManager, get_sync_db, get_async_db
+import hmac
+from typing import Optional
 
+from fastapi import Depends, Header, HTTPException, Request, status
+from app.core.config import EnvironmentOption, Settings
+from app.core.context import RequestContext, get_request_context
+from app.core.db.database import DatabaseManager, get_sync_db, get_async_db, get_async_read_db
+from app.core.mail import Mailer
+from app.core.passwords import PasswordHasher
 
-def get_settings(request: Request) -> Settings:
+
+async def get_settings(request: Request) -> Settings:
     """FastAPI dependency to get application settings"""
     return request.app.state.settings
 
 
-def get_db_manager(request: Request) -> DatabaseManager:
+async def get_db_manager(request: Request) -> DatabaseManager:
     """FastAPI dependency to get database manager"""
     return request.app.state.db_manager
 
 
-# Re-export database dependencies for convenience
+async def get_password_hasher(request: Request) -> PasswordHasher:
+    """FastAPI dependency to get the password hashing service"""
+    return request.app.state.password_hasher
+
+
+async def get_mailer(request: Request) -> Mailer:
+    """FastAPI dependency to get the email delivery queue"""
+    return request.app.state.mailer
+
+
+def _require_bearer(authorization: Optional[str], expected: Optional[str], detail: str):
+    """401 unless ``authorization`` carries ``expected`` as a bearer token; always 401 without one configured"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if not expected or scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def require_profiling_access(request: Request, authorization: Optional[str] = Header(default=None)):
+    """FastAPI dependency guarding the profiler: 404 unless enabled, 401 without the configured bearer token"""
+    settings = request.app.state.settings
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    _require_bearer(authorization, settings.PROFILING_TOKEN, "Invalid profiling token")
+
+
+async def require_metrics_access(request: Request, authorization: Optional[str] = Header(default=None)):
+    """FastAPI dependency guarding /metrics: open in local without METRICS_TOKEN, otherwise 401 without the bearer token"""
+    settings = request.app.state.settings
+    if not settings.METRICS_TOKEN and settings.ENVIRONMENT == EnvironmentOption.LOCAL:
+        return
+    _require_bearer(authorization, settings.METRICS_TOKEN, "Invalid metrics token")
+
+
+async def get_context() -> RequestContext:
+    """FastAPI dependency to get the current request context"""
+    return get_request_context()
+
+
+# Dependencies are async so they run on the event loop rather than the threadpool;
+# re-export database dependencies for convenience
 __all__ = [
     "get_settings",
-    "get_db_manager", 
+    "get_db_manager",
+    "get_password_hasher",
+    "get_mailer",
+    "get_context",
+    "require_profiling_access",
+    "require_metrics_access",
     "get_sync_db",
-    "get_async_db"
+    "get_async_db",
+    "get_async_read_db",
 ]
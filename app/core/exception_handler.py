@@ -1,21 +1,36 @@
+from itertools import islice
+from typing import Optional
+
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
 from slowapi.errors import RateLimitExceeded
-from app.core.response import error
+from app.core.metrics import metrics, route_label
+from app.core.response import error, render_error, rendered_response
+
+
+# The 429 body never changes, so it is serialized once
+TOO_MANY_REQUESTS_BODY = render_error(status.HTTP_429_TOO_MANY_REQUESTS, "Too many requests")
 
 
 # Rate limit exception handler
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
-    return error(
-        status=status.HTTP_429_TOO_MANY_REQUESTS, message="Too many requests", data=None
-    )
+    metrics.reject(route_label(request.scope))
+    return rendered_response(TOO_MANY_REQUESTS_BODY, status.HTTP_429_TOO_MANY_REQUESTS)
 
 
-# Validation exception handler
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    formatted_errors = {}
+def format_validation_errors(
+    errors,
+    max_errors: Optional[int] = None,
+    max_message_length: Optional[int] = None,
+) -> dict:
+    """Collapse pydantic error details into one message per field.
 
-    for error_detail in exc.errors():
+    Only the first ``max_errors`` errors are read, and each field's combined
+    message is cut to ``max_message_length`` characters.
+    """
+    messages = {}
+
+    for error_detail in islice(errors, max_errors):
         # Get the field name from loc
         # loc can be a tuple like ('body', 'field_name') or just ('field_name',)
         field_name_parts = error_detail.get("loc", [])
@@ -23,18 +38,36 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
         message = error_detail.get("msg", "Unknown validation error")
 
-        # Append message if multiple errors for the same field
-        if field_name in formatted_errors:
-            formatted_errors[field_name] += f"; {message}"
-        else:
-            formatted_errors[field_name] = message
+        # Collect messages per field; joined once below
+        messages.setdefault(field_name, []).append(message)
 
-    return error(
-        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        success=False,
-        message="Validation Failed",
-        data={"details": formatted_errors},
-    )
+    formatted_errors = {}
+    for field_name, field_messages in messages.items():
+        message = "; ".join(field_messages)
+        if max_message_length is not None and len(message) > max_message_length:
+            message = message[:max_message_length] + "..."
+        formatted_errors[field_name] = message
+
+    return formatted_errors
+
+
+# Validation exception handler
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    settings = request.app.state.settings
+    errors = exc.errors()
+    data = {
+        "details": format_validation_errors(
+            errors,
+            max_errors=settings.VALIDATION_MAX_ERRORS,
+            max_message_length=settings.VALIDATION_MAX_MESSAGE_LENGTH,
+        )
+    }
+    if len(errors) > settings.VALIDATION_MAX_ERRORS:
+        data["omitted_errors"] = len(errors) - settings.VALIDATION_MAX_ERRORS
+
+    # Serialized straight to bytes; floods of bad requests skip the response engine
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    return rendered_response(render_error(status_code, "Validation Failed", data), status_code)
 
 
 # Internal server error exception handler
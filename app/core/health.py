@@ -0,0 +1,164 @@
+"""Dependency health probes refreshed in the background.
+
+Probes run concurrently with a timeout on a fixed interval, and endpoints only
+read the cached results, so orchestrator polling never opens a connection.
+Optional probes are reported but never take the worker out of rotation.
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, Optional
+
+from app.core.config import Settings
+
+if TYPE_CHECKING:
+    from app.core.db.database import DatabaseManager
+
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[None]]
+
+# Every Redis user falls back to local state when Redis is unreachable (the
+# rate limiter to per-worker limits, the cache and idempotency tiers to their
+# in-process LRU, the email queue to dropping and logging), and all workers
+# share one Redis, so its outage should not take them all out of rotation
+OPTIONAL_PROBES = ("redis",)
+
+
+class HealthMonitor:
+    """Runs dependency probes periodically and keeps the latest results"""
+
+    def __init__(self, probes: Dict[str, Probe], interval: float, timeout: float, optional: Iterable[str] = ()):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.optional = frozenset(optional)
+        self.results: Dict[str, dict] = {}
+        self.last_refresh: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_probe(self, name: str, probe: Probe) -> dict:
+        started = time.perf_counter()
+        # Only the exception type is reported; messages can name hosts, users
+        # and driver internals, so the full text goes to the log alone
+        try:
+            await asyncio.wait_for(probe(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error, detail = "TimeoutError", f"timed out after {self.timeout}s"
+        except Exception as exc:
+            error, detail = type(exc).__name__, f"{type(exc).__name__}: {exc}"
+        else:
+            error = detail = None
+        result = {
+            "healthy": error is None,
+            "required": name not in self.optional,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "checked_at": time.time(),
+        }
+        if error is not None:
+            result["error"] = error
+
+        previous = self.results.get(name)
+        if previous is None or previous["healthy"] != result["healthy"]:
+            log = logger.info if result["healthy"] else logger.warning
+            log(f"Health check {name}: {'healthy' if result['healthy'] else detail}")
+        return result
+
+    async def refresh(self):
+        """Run every probe concurrently and store the results"""
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._run_probe(name, self.probes[name]) for name in names))
+        self.results = dict(zip(names, results))
+        self.last_refresh = time.time()
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Health check refresh failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """Start refreshing in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        """Stop the background refresh"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_healthy(self, name: str) -> bool:
+        result = self.results.get(name)
+        return bool(result and result["healthy"])
+
+    @property
+    def ready(self) -> bool:
+        """All probes have run and the required ones passed"""
+        return bool(self.results) and all(
+            result["healthy"] for result in self.results.values() if result["required"]
+        )
+
+    def report(self) -> dict:
+        """Cached probe results with an overall status"""
+        if self.last_refresh is None:
+            status = "pending"
+        else:
+            healthy = all(result["healthy"] for result in self.results.values())
+            status = "ok" if self.ready and healthy else "degraded"
+        return {
+            "status": status,
+            "last_refresh": self.last_refresh,
+            "checks": self.results,
+        }
+
+
+def database_probe(db_manager: "DatabaseManager") -> Probe:
+    from sqlalchemy import text
+
+    async def probe():
+        async with db_manager.async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    return probe
+
+
+def redis_probe(redis_url: str) -> Probe:
+    client = None
+
+    async def probe():
+        nonlocal client
+        if client is None:
+            import redis.asyncio
+
+            client = redis.asyncio.from_url(redis_url, socket_connect_timeout=5)
+        await client.ping()
+
+    return probe
+
+
+def build_probes(settings: Settings, db_manager: "DatabaseManager") -> Dict[str, Probe]:
+    """Probes for the database, and for Redis when a component is configured to use it"""
+    probes = {"database": database_probe(db_manager)}
+    if settings.redis_in_use:
+        probes["redis"] = redis_probe(settings.redis_url)
+    return probes
+
+
+def build_health_monitor(settings: Settings, db_manager: Optional["DatabaseManager"] = None) -> HealthMonitor:
+    """Health monitor for the configured dependencies; without a database manager
+    it starts with no probes (and not ready) until build_probes() fills them in"""
+    return HealthMonitor(
+        probes=build_probes(settings, db_manager) if db_manager is not None else {},
+        interval=settings.HEALTH_CHECK_INTERVAL,
+        timeout=settings.HEALTH_CHECK_TIMEOUT,
+        optional=OPTIONAL_PROBES,
+    )
@@ -0,0 +1,403 @@
+"""Idempotency-Key support for POST routes.
+
+The first response to a request carrying an ``Idempotency-Key`` header is
+stored as bytes and replayed for every retry with the same key, so a client
+or load balancer retrying after a network blip cannot repeat the write.
+Responses live in a bounded in-process LRU and, when enabled, in Redis so
+every worker sees them. While the first request is still running,
+duplicates wait for its result instead of running again: on the same worker
+through a shared future, across workers through a short-lived Redis lock.
+
+Only final outcomes are stored. Server errors, rate limit rejections and
+``503``s are not, so retrying them runs the request again.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import Header, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from slowapi.util import get_remote_address
+
+from app.core.config import Settings, get_settings
+from app.core.response import error, json_response
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "idempotency"
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Retryable outcomes; a retry with the same key runs the request again
+NOT_STORED = {status.HTTP_429_TOO_MANY_REQUESTS, status.HTTP_503_SERVICE_UNAVAILABLE}
+
+# Delete the lock only if this request still owns it
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class StoredResponse:
+    """The response first sent for a key, and a fingerprint of the request that produced it"""
+
+    __slots__ = ("status_code", "media_type", "body", "fingerprint", "expires_at")
+
+    def __init__(self, status_code: int, media_type: str, body: bytes, fingerprint: str, expires_at: float):
+        self.status_code = status_code
+        self.media_type = media_type
+        self.body = body
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+
+
+class IdempotencyTimeout(RuntimeError):
+    """The request holding the key did not finish within the wait timeout"""
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class IdempotencyStore:
+    """Stored responses by idempotency key, plus coordination of requests in flight"""
+
+    def __init__(
+        self,
+        ttl: int,
+        max_entries: int,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        lock_ttl: int = 30,
+        wait_timeout: float = 10.0,
+        enabled: bool = True,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.redis_url = redis_url
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._redis = None
+        self._release = None
+        self.metrics = {
+            "executed": 0,
+            "replayed": 0,
+            "waited": 0,
+            "mismatched": 0,
+            "timeouts": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "IdempotencyStore":
+        return cls(
+            ttl=settings.IDEMPOTENCY_TTL,
+            max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+            max_bytes=settings.IDEMPOTENCY_MAX_BYTES,
+            redis_url=settings.redis_url if settings.IDEMPOTENCY_REDIS_ENABLED else None,
+            lock_ttl=settings.IDEMPOTENCY_LOCK_TTL,
+            wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+            enabled=settings.IDEMPOTENCY_ENABLED,
+        )
+
+    @property
+    def redis(self):
+        """Lazily created asyncio Redis client, or None when the tier is off"""
+        if self.redis_url and self._redis is None:
+            import redis.asyncio
+
+            self._redis = redis.asyncio.from_url(self.redis_url)
+            self._release = self._redis.register_script(_RELEASE_LOCK)
+        return self._redis
+
+    # In-process tier
+
+    def _get_local(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove_local(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _remove_local(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def _set_local(self, key: str, entry: StoredResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_local(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.metrics["evictions"] += 1
+
+    # Redis tier
+
+    async def _get_redis(self, key: str) -> Optional[StoredResponse]:
+        if self.redis is None:
+            return None
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(f"{REDIS_KEY_PREFIX}:{key}", "status", "media_type", "body", "fingerprint")
+                pipe.pttl(f"{REDIS_KEY_PREFIX}:{key}")
+                (status_code, media_type, body, request_fingerprint), ttl_ms = await pipe.execute()
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Idempotency Redis lookup failed", exc_info=True)
+            return None
+        if body is None or ttl_ms <= 0:
+            return None
+        return StoredResponse(
+            int(status_code),
+            media_type.decode(),
+            body,
+            request_fingerprint.decode(),
+            time.monotonic() + ttl_ms / 1000,
+        )
+
+    async def _set_redis(self, key: str, entry: StoredResponse):
+        if self.redis is None:
+            return
+        redis_key = f"{REDIS_KEY_PREFIX}:{key}"
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    redis_key,
+                    mapping={
+                        "status": entry.status_code,
+                        "media_type": entry.media_type,
+                        "body": entry.body,
+                        "fingerprint": entry.fingerprint,
+                    },
+                )
+                pipe.expire(redis_key, self.ttl)
+                await pipe.execute()
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Idempotency Redis store failed", exc_info=True)
+
+    async def _acquire(self, key: str, token: str) -> bool:
+        """Claim the key across workers; True without Redis or when Redis is unreachable"""
+        if self.redis is None:
+            return True
+        try:
+            return bool(await self.redis.set(f"{REDIS_KEY_PREFIX}-lock:{key}", token, nx=True, ex=self.lock_ttl))
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Idempotency Redis lock failed", exc_info=True)
+            return True
+
+    async def _release_lock(self, key: str, token: str):
+        if self.redis is None:
+            return
+        try:
+            await self._release(keys=[f"{REDIS_KEY_PREFIX}-lock:{key}"], args=[token])
+        except Exception:
+            self.metrics["redis_errors"] += 1
+            logger.warning("Idempotency Redis unlock failed", exc_info=True)
+
+    async def _wait_for_worker(self, key: str, deadline: float) -> Optional[StoredResponse]:
+        """Poll for another worker's result; None once it gives up the key without one"""
+        delay = 0.01
+        while True:
+            entry = await self._get_redis(key)
+            if entry is not None:
+                self._set_local(key, entry)
+                return entry
+            try:
+                if not await self.redis.exists(f"{REDIS_KEY_PREFIX}-lock:{key}"):
+                    return None
+            except Exception:
+                self.metrics["redis_errors"] += 1
+                return None
+            if time.monotonic() + delay > deadline:
+                raise IdempotencyTimeout(f"request for this key still running after {self.wait_timeout}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+    # Public API
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        """Look a key up in the in-process tier, then Redis"""
+        entry = self._get_local(key)
+        if entry is None:
+            entry = await self._get_redis(key)
+            if entry is not None:
+                self._set_local(key, entry)
+        return entry
+
+    async def run(self, key: str, request_fingerprint: str, call):
+        """The stored response for ``key``, or the Response from running ``call`` once.
+
+        Returns a StoredResponse when another request with the key produced
+        the result; raises IdempotencyTimeout when it is still running after
+        ``wait_timeout``.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            entry = await self.get(key)
+            if entry is not None:
+                return entry
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            # Same worker: wait for the request already running, then look again
+            self.metrics["waited"] += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(pending), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.metrics["timeouts"] += 1
+                raise IdempotencyTimeout(f"request for this key still running after {self.wait_timeout}s")
+
+        pending = self._pending[key] = asyncio.get_running_loop().create_future()
+        token = uuid.uuid4().hex
+        try:
+            while not await self._acquire(key, token):
+                # Another worker holds the key
+                self.metrics["waited"] += 1
+                try:
+                    entry = await self._wait_for_worker(key, deadline)
+                except IdempotencyTimeout:
+                    self.metrics["timeouts"] += 1
+                    raise
+                if entry is not None:
+                    return entry
+            try:
+                response = await call()
+                self.metrics["executed"] += 1
+                if response.status_code < 500 and response.status_code not in NOT_STORED:
+                    entry = StoredResponse(
+                        response.status_code,
+                        response.media_type or "application/json",
+                        bytes(response.body),
+                        request_fingerprint,
+                        time.monotonic() + self.ttl,
+                    )
+                    self._set_local(key, entry)
+                    await self._set_redis(key, entry)
+                return response
+            finally:
+                await self._release_lock(key, token)
+        finally:
+            del self._pending[key]
+            pending.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "in_flight": len(self._pending),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "redis_enabled": self.redis_url is not None,
+        }
+
+
+idempotency_store = IdempotencyStore.from_settings(get_settings())
+
+
+def store_key(request: Request, idempotency_key: str) -> str:
+    """Key of a request's stored response, scoped to the client that sent it.
+
+    Clients pick their own keys, so the same key from two clients names two
+    different requests. Clients are told apart by remote address, like the
+    rate limiter; once requests are authenticated, the subject belongs here.
+    """
+    return f"{get_remote_address(request)}:{request.method}:{request.url.path}:{idempotency_key}"
+
+
+def _replay(entry: StoredResponse) -> Response:
+    idempotency_store.metrics["replayed"] += 1
+    return Response(
+        content=entry.body,
+        status_code=entry.status_code,
+        media_type=entry.media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent():
+    """Honour an ``Idempotency-Key`` header on a POST route.
+
+    Requests without the header run as usual. The route must take a
+    ``request: Request`` parameter and sit outside any rate limit decorator,
+    so replays are not charged against the limit. The request body must be
+    small enough to read up front; it is fingerprinted so a key reused for a
+    different request is rejected with 422.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, idempotency_key: Optional[str] = None, **kwargs):
+            if idempotency_key is None or not idempotency_store.enabled:
+                return await func(*args, **kwargs)
+            if len(idempotency_key) > MAX_KEY_LENGTH or not idempotency_key.isprintable():
+                return error(status=status.HTTP_400_BAD_REQUEST, message=f"Invalid {HEADER} header", data=None)
+
+            request: Request = kwargs["request"]
+            request_fingerprint = fingerprint(await request.body())
+
+            async def call() -> Response:
+                result = await func(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                return json_response(jsonable_encoder(result))
+
+            try:
+                outcome = await idempotency_store.run(store_key(request, idempotency_key), request_fingerprint, call)
+            except IdempotencyTimeout:
+                response = error(
+                    status=status.HTTP_409_CONFLICT,
+                    message=f"A request with this {HEADER} is still being processed",
+                    data=None,
+                )
+                response.headers["Retry-After"] = "1"
+                return response
+            if isinstance(outcome, Response):
+                return outcome
+            if outcome.fingerprint != request_fingerprint:
+                idempotency_store.metrics["mismatched"] += 1
+                return error(
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    message=f"{HEADER} was already used for a different request",
+                    data=None,
+                )
+            return _replay(outcome)
+
+        key_parameter = inspect.Parameter(
+            "idempotency_key",
+            inspect.Parameter.KEYWORD_ONLY,
+            default=Header(None, alias=HEADER, description="Unique key (such as a UUID) to make retries of this request safe"),
+            annotation=Optional[str],
+        )
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), key_parameter])
+        return wrapper
+
+    return decorator
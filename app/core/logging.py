@@ -1,5 +1,14 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+from datetime import datetime, timezone
 from enum import StrEnum
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from app.core.config import LogRotation
+from app.core.context import current_request_id
 
 # LOG_FORMAT_DEBUG = "%(levelname)s:%(message)s:%(pathname)s:%(funcName)s:%(lineno)d"
 LOG_FORMAT_DEBUG = "%(asctime)s: %(levelname)s: %(pathname)s - %(funcName)s - Line %(lineno)d - %(message)s"
@@ -11,7 +20,156 @@ class LogLevels(StrEnum):
     warning = "WARNING"
     error = "ERROR"
 
-def configure_logging(log_level: str = LogLevels.error, log_to_file: bool = False ):
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id while still on the calling thread"""
+
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: records are dropped (and counted) when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Like QueueHandler.prepare, but the traceback stays in exc_text rather
+        # than being folded into the message, so formatters can place it
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _BatchFlushMixin:
+    """Leaves flushing to the listener so a whole batch is written at once"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchingStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchingRotatingFileHandler(_BatchFlushMixin, RotatingFileHandler):
+    pass
+
+
+class BatchingTimedRotatingFileHandler(_BatchFlushMixin, TimedRotatingFileHandler):
+    pass
+
+
+class BatchingQueueListener(QueueListener):
+    """Drains up to ``batch_size`` records per wake-up, then flushes handlers once"""
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than raising queue.Full when stopping under load
+        self.queue.put(self._sentinel)
+
+    def _flush(self):
+        for handler in self.handlers:
+            getattr(handler, "flush_batch", handler.flush)()
+
+    def _monitor(self):
+        while True:
+            record = self.dequeue(True)
+            stop = record is self._sentinel
+            handled = 0
+            while not stop:
+                self.handle(record)
+                handled += 1
+                if handled >= self.batch_size:
+                    break
+                try:
+                    record = self.dequeue(False)
+                except queue.Empty:
+                    break
+                stop = record is self._sentinel
+            self._flush()
+            if stop:
+                break
+
+
+_listener = None
+_queue_handler = None
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure_logging(
+    log_level: str = LogLevels.error,
+    log_to_file: bool = False,
+    log_file: str = "app.log",
+    rotation: LogRotation = LogRotation.SIZE,
+    max_bytes: int = 10 * 1024 * 1024,
+    rotate_when: str = "midnight",
+    backup_count: int = 5,
+    json_format: bool = False,
+    queue_size: int = 10_000,
+    batch_size: int = 256,
+):
+    """Route all logging through a queue drained by a background listener thread.
+
+    Request paths only enqueue records; formatting and (rotating) file writes
+    happen on the listener thread in batches.
+    """
+    global _listener, _queue_handler
     log_level = str(log_level).upper()
     log_levels = [level.value for level in LogLevels]
 
@@ -19,13 +177,36 @@ def configure_logging(log_level: str = LogLevels.error, log_to_file: bool = Fals
         logging.basicConfig(level=logging.ERROR)
         return
 
-    log_format = LOG_FORMAT_DEBUG if log_level == LogLevels.debug.value else LOG_FORMAT_DEFAULT
-    log_file = "app.log" if log_to_file else None
+    if json_format:
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT_DEBUG if log_level == LogLevels.debug.value else LOG_FORMAT_DEFAULT)
 
-    handlers = [logging.StreamHandler()]
+    handlers = [BatchingStreamHandler()]
     if log_to_file:
-        handlers.append(logging.FileHandler(log_file))
+        if rotation == LogRotation.TIME:
+            handlers.append(BatchingTimedRotatingFileHandler(
+                log_file, when=rotate_when, backupCount=backup_count, encoding="utf-8", delay=True
+            ))
+        else:
+            handlers.append(BatchingRotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+            ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _stop_listener()
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    # Only the message and any traceback are rendered on the calling thread
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    _listener = BatchingQueueListener(log_queue, *handlers, batch_size=batch_size)
+    _listener.start()
+
+    logging.basicConfig(level=log_level, handlers=[queue_handler], force=True)
+
+    logging.debug(f"Logging configured at level: {log_level}")
 
-    logging.basicConfig(level=log_level, format=log_format, handlers=handlers)
 
-    logging.debug(f"Logging configured at level: {log_level}")
\ No newline at end of file
+atexit.register(_stop_listener)
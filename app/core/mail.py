@@ -0,0 +1,593 @@
+"""Out-of-band email delivery.
+
+Request handlers call ``Mailer.send()``, which only queues the message. A
+small pool of delivery workers sends it later, so SMTP latency never reaches
+the request path. Each worker keeps its own SMTP connection open and reuses
+it until the connection has been idle for a while. A worker takes up to
+``batch_size`` queued messages at a time and sends them over that connection
+in one thread hop. smtplib blocks, so sending runs on the mailer's own
+threads, never on the event loop or the shared threadpool.
+
+Transient failures (connection errors, timeouts, 4xx replies) are retried with
+exponential backoff up to ``max_attempts``. Permanent 5xx rejections are
+dropped and logged. The in-process queue is lost if the process dies; the
+Redis queue keeps messages across restarts and delivers at least once.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import smtplib
+import socket
+import ssl
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+from app.core.config import EmailSecurity, Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Longest wait before a retry, whatever the attempt number
+MAX_RETRY_DELAY = 300.0
+# How long an idle worker waits for a message before checking for shutdown
+POLL_INTERVAL = 1.0
+
+REDIS_KEY_PREFIX = "email"
+# Seconds between consumer heartbeats; a consumer missing three is presumed dead
+HEARTBEAT_INTERVAL = 10
+
+
+class EmailQueueFull(RuntimeError):
+    """The in-process queue already holds EMAIL_QUEUE_SIZE messages"""
+
+
+class OutgoingEmail:
+    """A queued message and its delivery attempts so far"""
+
+    __slots__ = ("id", "to", "subject", "body", "html", "attempts", "queued_at", "raw")
+
+    def __init__(
+        self,
+        to: str,
+        subject: str,
+        body: str,
+        html: Optional[str] = None,
+        id: Optional[str] = None,
+        attempts: int = 0,
+        queued_at: Optional[float] = None,
+    ):
+        self.id = id or uuid.uuid4().hex
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.html = html
+        self.attempts = attempts
+        self.queued_at = queued_at if queued_at is not None else time.time()
+        # Serialized form as stored in Redis, to acknowledge it by value
+        self.raw: Optional[bytes] = None
+
+    def dumps(self) -> bytes:
+        return json.dumps({
+            "id": self.id,
+            "to": self.to,
+            "subject": self.subject,
+            "body": self.body,
+            "html": self.html,
+            "attempts": self.attempts,
+            "queued_at": self.queued_at,
+        }).encode()
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "OutgoingEmail":
+        message = cls(**json.loads(raw))
+        message.raw = raw
+        return message
+
+    def to_message(self, sender: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = sender
+        message["To"] = self.to
+        message["Subject"] = self.subject
+        # Stable across retries, so a message delivered twice can be recognized
+        message["Message-ID"] = f"<{self.id}@{sender.rpartition('@')[2].rstrip('>') or 'localhost'}>"
+        message.set_content(self.body)
+        if self.html is not None:
+            message.add_alternative(self.html, subtype="html")
+        return message
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether retrying cannot help: the server rejected the message with a 5xx reply"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _breaks_connection(error: Exception) -> bool:
+    # A reply rejecting one message leaves the session usable; anything else does not
+    return not isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused))
+
+
+class SMTPConnection:
+    """One reusable SMTP session; only ever used from one thread at a time"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        security: EmailSecurity = EmailSecurity.NONE,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: float = 10.0,
+        idle_timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.security = security
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.opened = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.security == EmailSecurity.TLS:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.security == EmailSecurity.STARTTLS:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self.opened += 1
+        return smtp
+
+    def _session(self) -> Tuple[smtplib.SMTP, bool]:
+        """The open session (reconnecting when idle too long) and whether it was reused"""
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            # Servers drop idle sessions; reconnecting is cheaper than a failed send
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+            return self._smtp, False
+        return self._smtp, True
+
+    def _send(self, message: EmailMessage):
+        smtp, reused = self._session()
+        try:
+            smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            if not reused:
+                raise
+            # The server closed a session we were still holding; one fresh try
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+        finally:
+            # A rejected message still used the session
+            self._last_used = time.monotonic()
+
+    def deliver(self, messages: List[OutgoingEmail], sender: str) -> List[Optional[Exception]]:
+        """Send each message; the error for each one, or None when it was accepted.
+
+        Once the connection itself fails, the rest of the batch is not tried
+        and reports the same error.
+        """
+        results: List[Optional[Exception]] = []
+        for message in messages:
+            try:
+                self._send(message.to_message(sender))
+            except Exception as exc:
+                results.append(exc)
+                if _breaks_connection(exc):
+                    self.close()
+                    results.extend([exc] * (len(messages) - len(results)))
+                    break
+            else:
+                results.append(None)
+        return results
+
+    def close(self):
+        if self._smtp is None:
+            return
+        smtp, self._smtp = self._smtp, None
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+class MemoryEmailQueue:
+    """In-process queue; retries wait on timers. Lost if the process dies."""
+
+    durable = False
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._queue: "asyncio.Queue[OutgoingEmail]" = asyncio.Queue()
+        self._scheduled = set()
+
+    async def start(self):
+        pass
+
+    async def put(self, message: OutgoingEmail):
+        # Retries count against the bound too; they are messages still to send
+        if self._queue.qsize() + len(self._scheduled) >= self.max_size:
+            raise EmailQueueFull("email queue is full")
+        self._queue.put_nowait(message)
+
+    async def get_batch(self, size: int, timeout: float) -> List[OutgoingEmail]:
+        try:
+            batch = [await asyncio.wait_for(self._queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while len(batch) < size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def done(self, messages: List[OutgoingEmail]):
+        pass
+
+    async def retry(self, message: OutgoingEmail, delay: float):
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._scheduled.discard(handle)
+            self._queue.put_nowait(message)
+
+        handle = loop.call_later(delay, requeue)
+        self._scheduled.add(handle)
+
+    def idle(self) -> bool:
+        """Nothing queued and no retry waiting"""
+        return self._queue.empty() and not self._scheduled
+
+    async def depth(self) -> int:
+        return self._queue.qsize() + len(self._scheduled)
+
+    async def close(self) -> int:
+        """Drop whatever is left; returns how many messages were lost"""
+        lost = self._queue.qsize() + len(self._scheduled)
+        for handle in self._scheduled:
+            handle.cancel()
+        self._scheduled.clear()
+        self._queue = asyncio.Queue()
+        return lost
+
+
+# Move retries that are due back onto the queue, oldest first
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+    redis.call('RPUSH', KEYS[2], unpack(due))
+end
+return #due
+"""
+
+
+class RedisEmailQueue:
+    """Durable queue shared by every worker process.
+
+    Messages are pushed onto a list and moved atomically onto this consumer's
+    processing list when taken, and removed from it once handled. Retries
+    wait in a sorted set scored by due time. A consumer refreshes a heartbeat
+    key while it runs. At startup, processing lists whose consumer has no
+    heartbeat (it died mid-batch) go back onto the queue, so a message is
+    delivered at least once.
+    """
+
+    durable = True
+
+    def __init__(self, redis_url: str, consumer: Optional[str] = None, connection_pool=None):
+        self.redis_url = redis_url
+        # An existing redis.asyncio connection pool to use instead of connecting to ``redis_url``
+        self.connection_pool = connection_pool
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.queue_key = f"{REDIS_KEY_PREFIX}:queue"
+        self.retry_key = f"{REDIS_KEY_PREFIX}:retry"
+        self.processing_key = f"{REDIS_KEY_PREFIX}:processing:{self.consumer}"
+        self.heartbeat_key = f"{REDIS_KEY_PREFIX}:consumer:{self.consumer}"
+        self._redis = None
+        self._promote = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis.asyncio
+
+            if self.connection_pool is not None:
+                self._redis = redis.asyncio.Redis(connection_pool=self.connection_pool)
+            else:
+                self._redis = redis.asyncio.from_url(self.redis_url)
+            self._promote = self._redis.register_script(_PROMOTE_DUE)
+        return self._redis
+
+    async def _beat_forever(self):
+        while True:
+            try:
+                await self.redis.set(self.heartbeat_key, b"1", ex=HEARTBEAT_INTERVAL * 3)
+            except Exception:
+                logger.warning("Email queue heartbeat failed", exc_info=True)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _requeue(self, processing_key: str) -> int:
+        moved = 0
+        while await self.redis.lmove(processing_key, self.queue_key, "LEFT", "RIGHT") is not None:
+            moved += 1
+        return moved
+
+    async def start(self):
+        """Start the heartbeat and recover batches left behind by dead consumers"""
+        await self.redis.set(self.heartbeat_key, b"1", ex=HEARTBEAT_INTERVAL * 3)
+        self._heartbeat = asyncio.create_task(self._beat_forever())
+        async for key in self.redis.scan_iter(match=f"{REDIS_KEY_PREFIX}:processing:*"):
+            key = key.decode()
+            consumer = key[len(f"{REDIS_KEY_PREFIX}:processing:"):]
+            if consumer != self.consumer and not await self.redis.exists(f"{REDIS_KEY_PREFIX}:consumer:{consumer}"):
+                moved = await self._requeue(key)
+                if moved:
+                    logger.warning(f"Requeued {moved} emails left in flight by {consumer}")
+
+    async def put(self, message: OutgoingEmail):
+        await self.redis.lpush(self.queue_key, message.dumps())
+
+    async def get_batch(self, size: int, timeout: float) -> List[OutgoingEmail]:
+        redis = self.redis
+        await self._promote(keys=[self.retry_key, self.queue_key], args=[time.time(), size])
+        first = await redis.blmove(self.queue_key, self.processing_key, timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        raw = [first]
+        if size > 1:
+            async with redis.pipeline(transaction=False) as pipe:
+                for _ in range(size - 1):
+                    pipe.lmove(self.queue_key, self.processing_key, "RIGHT", "LEFT")
+                raw += [item for item in await pipe.execute() if item is not None]
+        return [OutgoingEmail.loads(item) for item in raw]
+
+    async def done(self, messages: List[OutgoingEmail]):
+        if not messages:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for message in messages:
+                pipe.lrem(self.processing_key, 1, message.raw)
+            await pipe.execute()
+
+    async def retry(self, message: OutgoingEmail, delay: float):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.retry_key, {message.dumps(): time.time() + delay})
+            pipe.lrem(self.processing_key, 1, message.raw)
+            await pipe.execute()
+
+    def idle(self) -> bool:
+        # What is left stays in Redis for the other workers or the next start
+        return True
+
+    async def depth(self) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.llen(self.queue_key)
+            pipe.zcard(self.retry_key)
+            queued, retrying = await pipe.execute()
+        return queued + retrying
+
+    async def close(self) -> int:
+        """Hand unfinished messages back to the queue and stop the heartbeat"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._redis is not None:
+            await self._requeue(self.processing_key)
+            await self._redis.delete(self.heartbeat_key)
+            await self._redis.aclose()
+            self._redis = None
+        return 0
+
+
+class Mailer:
+    """Queues outgoing email and delivers it from a pool of background workers"""
+
+    def __init__(
+        self,
+        connection: dict,
+        sender: str,
+        queue,
+        workers: int = 2,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        retry_backoff: float = 2.0,
+        enabled: bool = True,
+    ):
+        self.sender = sender
+        self.queue = queue
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.enabled = enabled
+        self._connections = [SMTPConnection(**connection) for _ in range(workers)]
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._busy = set()
+        self._stopping = False
+        self.metrics = {
+            "queued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "dropped": 0,
+            "batches": 0,
+            "send_seconds_total": 0.0,
+            "send_seconds_max": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Mailer":
+        if settings.EMAIL_QUEUE_REDIS_ENABLED:
+            queue = RedisEmailQueue(settings.redis_url)
+        else:
+            queue = MemoryEmailQueue(settings.EMAIL_QUEUE_SIZE)
+        return cls(
+            connection={
+                "host": settings.EMAIL_HOST,
+                "port": settings.EMAIL_PORT,
+                "security": settings.EMAIL_SECURITY,
+                "username": settings.EMAIL_USERNAME,
+                "password": settings.EMAIL_PASSWORD,
+                "timeout": settings.EMAIL_TIMEOUT,
+                "idle_timeout": settings.EMAIL_CONNECTION_IDLE_TIMEOUT,
+            },
+            sender=settings.EMAIL_FROM,
+            queue=queue,
+            workers=settings.EMAIL_WORKERS,
+            batch_size=settings.EMAIL_BATCH_SIZE,
+            max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+            retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+            enabled=settings.EMAIL_ENABLED,
+        )
+
+    async def send(self, to: str, subject: str, body: str, html: Optional[str] = None) -> bool:
+        """Queue a message for delivery; False when email is off or the queue is full.
+
+        Never raises for delivery problems, so callers can send from a
+        request without handling SMTP or queue errors.
+        """
+        if not self.enabled:
+            return False
+        try:
+            await self.queue.put(OutgoingEmail(to=to, subject=subject, body=body, html=html))
+        except Exception as exc:
+            self.metrics["dropped"] += 1
+            logger.warning(f"Email to {to} not queued: {type(exc).__name__}: {exc}")
+            return False
+        self.metrics["queued"] += 1
+        return True
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(MAX_RETRY_DELAY, self.retry_backoff * 2 ** (attempts - 1))
+        # Jitter spreads out retries of messages that failed together
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _deliver(self, connection: SMTPConnection, batch: List[OutgoingEmail]):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        future = self._executor.submit(connection.deliver, batch, self.sender)
+        # The connection stays in use until the thread finishes, even if this task is cancelled
+        self._busy.add(connection)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._busy.discard, connection))
+        try:
+            results = await asyncio.wrap_future(future)
+        except Exception as exc:
+            results = [exc] * len(batch)
+        elapsed = time.perf_counter() - started
+        self.metrics["batches"] += 1
+        self.metrics["send_seconds_total"] += elapsed
+        self.metrics["send_seconds_max"] = max(self.metrics["send_seconds_max"], elapsed)
+
+        finished = []
+        for message, error in zip(batch, results):
+            if error is None:
+                self.metrics["sent"] += 1
+                finished.append(message)
+                continue
+            message.attempts += 1
+            if is_permanent(error) or message.attempts >= self.max_attempts:
+                self.metrics["failed"] += 1
+                finished.append(message)
+                logger.error(f"Email {message.id} to {message.to} failed after {message.attempts} attempts: {type(error).__name__}: {error}")
+            else:
+                self.metrics["retried"] += 1
+                delay = self._backoff(message.attempts)
+                logger.warning(f"Email {message.id} to {message.to} will be retried in {delay:.1f}s: {type(error).__name__}: {error}")
+                await self.queue.retry(message, delay)
+        await self.queue.done(finished)
+
+    async def _work(self, connection: SMTPConnection):
+        while not (self._stopping and self.queue.idle()):
+            try:
+                batch = await self.queue.get_batch(self.batch_size, POLL_INTERVAL)
+                if batch:
+                    await self._deliver(connection, batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email delivery worker error")
+                await asyncio.sleep(POLL_INTERVAL)
+
+    async def start(self):
+        """Start the delivery workers; a no-op when email is off"""
+        if not self.enabled or self._tasks:
+            return
+        await self.queue.start()
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="email")
+        self._tasks = [asyncio.create_task(self._work(connection)) for connection in self._connections]
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Send what is queued (up to ``timeout`` seconds), then close every connection.
+
+        With the in-process queue, whatever is still unsent afterwards is
+        lost and logged; the Redis queue keeps it for the next start.
+        """
+        if not self._tasks:
+            return
+        self._stopping = True
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+        lost = await self.queue.close()
+        if lost:
+            self.metrics["dropped"] += lost
+            logger.warning(f"{lost} queued emails were not sent before shutdown")
+        loop = asyncio.get_running_loop()
+        idle = [connection for connection in self._connections if connection not in self._busy]
+        await asyncio.gather(*(loop.run_in_executor(self._executor, connection.close) for connection in idle))
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def stats(self) -> dict:
+        metrics = self.metrics
+        batches = metrics["batches"]
+        try:
+            depth = await self.queue.depth()
+        except Exception:
+            depth = None
+        return {
+            "enabled": self.enabled,
+            "queue": "redis" if self.queue.durable else "memory",
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "queue_depth": depth,
+            "queued": metrics["queued"],
+            "sent": metrics["sent"],
+            "retried": metrics["retried"],
+            "failed": metrics["failed"],
+            "dropped": metrics["dropped"],
+            "connections_opened": sum(connection.opened for connection in self._connections),
+            "mean_batch_ms": round(metrics["send_seconds_total"] / batches * 1000, 3) if batches else 0.0,
+            "max_batch_ms": round(metrics["send_seconds_max"] * 1000, 3),
+        }
@@ -0,0 +1,242 @@
+"""Request timing and hot-path metrics with Prometheus text exposition.
+
+Histograms are fixed bucket lists and counters are plain integers, updated
+on the event loop thread (the async engines run their query hooks there
+too), so recording a request costs a handful of dict and list operations.
+Live values (in-flight requests, threadpool, connection pools, password
+hashing, dropped log records) are sampled only when ``/metrics`` is scraped.
+"""
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.context import current_request_context, in_flight
+from app.core.logging import dropped_records
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the queries-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+# (name, type, help, labels, value) read at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+class Histogram:
+    """Cumulative-on-render histogram over fixed upper bounds"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: str = "") -> Iterable[str]:
+        separator = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}'
+        braces = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{braces} {self.sum}"
+        yield f"{name}_count{braces} {self.count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _family(name: str, kind: str, description: str) -> List[str]:
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+
+class Metrics:
+    """Per-process request, database and rate limiter metrics"""
+
+    def __init__(self):
+        self.enabled = True
+        self.requests: Dict[Tuple[str, str, int], Histogram] = {}
+        self.db_queries_per_request = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_query_seconds = Histogram(LATENCY_BUCKETS)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_query(self, seconds: float):
+        self.db_query_seconds.observe(seconds)
+        context = current_request_context()
+        if context is not None:
+            context.db_queries += 1
+            context.db_seconds += seconds
+
+    def reject(self, route: str):
+        """Count a request turned away by a rate limit"""
+        self.rate_limited[route] += 1
+
+    def render(self, samples: Iterable[Sample] = ()) -> str:
+        """Prometheus text exposition of everything recorded plus sampled values"""
+        lines = _family("http_request_duration_seconds", "histogram", "Time from request start to the end of the response")
+        for (method, route, status), histogram in self.requests.items():
+            labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+            lines.extend(histogram.samples("http_request_duration_seconds", labels))
+
+        lines += _family("http_requests_rate_limited_total", "counter", "Requests rejected by a rate limit")
+        for route, count in self.rate_limited.items():
+            lines.append(f'http_requests_rate_limited_total{{route="{_escape(route)}"}} {count}')
+
+        lines += _family("db_queries_per_request", "histogram", "Database queries executed per HTTP request")
+        lines.extend(self.db_queries_per_request.samples("db_queries_per_request"))
+        lines += _family("db_query_duration_seconds", "histogram", "Database query execution time")
+        lines.extend(self.db_query_seconds.samples("db_query_duration_seconds"))
+
+        families = {}
+        for name, kind, description, labels, value in samples:
+            if name not in families:
+                families[name] = _family(name, kind, description)
+            label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            families[name].append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        for family in families.values():
+            lines += family
+        return "\n".join(lines) + "\n"
+
+
+# Metrics for this worker process
+metrics = Metrics()
+
+
+def route_label(scope: Scope, status: int = 200) -> str:
+    # Route templates keep the label set bounded; unrouted paths are never used
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "unmatched" if status == 404 else "other"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and database time.
+
+    Must sit inside RequestContextMiddleware, whose context collects the
+    request's query counts. With ``server_timing`` the response carries a
+    ``Server-Timing`` header with the time to the start of the response and
+    the database time up to then.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics = metrics, server_timing: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        context = current_request_context()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    timing = f"app;dur={elapsed_ms:.1f}"
+                    if context is not None and context.db_queries:
+                        timing += f', db;dur={context.db_seconds * 1000:.1f};desc="{context.db_queries} queries"'
+                    message["headers"] = [*message.get("headers", ()), (SERVER_TIMING_HEADER, timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.metrics.observe_request(scope["method"], route_label(scope, status), status, time.perf_counter() - started)
+            if context is not None:
+                self.metrics.db_queries_per_request.observe(context.db_queries)
+
+
+def install_query_hooks():
+    """Time every SQL statement on every engine; idempotent"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        return
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        metrics.observe_query(time.perf_counter() - started)
+
+
+def collect_samples(app) -> List[Sample]:
+    """Sample the live gauges and counters of a running application; call on the event loop"""
+    from anyio.to_thread import current_default_thread_limiter
+
+    threadpool = current_default_thread_limiter().statistics()
+    samples = [
+        ("http_requests_in_flight", "gauge", "Requests being served", {}, in_flight.count),
+        ("threadpool_threads_in_use", "gauge", "Threadpool threads held by sync endpoints and dependencies", {}, threadpool.borrowed_tokens),
+        ("threadpool_threads_total", "gauge", "Threadpool size", {}, threadpool.total_tokens),
+        ("threadpool_tasks_waiting", "gauge", "Tasks queued for a threadpool thread", {}, threadpool.tasks_waiting),
+    ]
+
+    db_manager = getattr(app.state, "db_manager", None)
+    if db_manager is not None:
+        for pool, status in db_manager.pool_status().items():
+            labels = {"pool": pool}
+            samples.append(("db_pool_connections_checked_out", "gauge", "Connections checked out of the pool", labels, status["checked_out"]))
+            samples.append(("db_pool_connections_overflow", "gauge", "Connections open above the pool size", labels, status["overflow"]))
+            samples.append(("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection", labels, status["timeouts"]))
+        for engine, status in db_manager.statement_cache_status().items():
+            compiled = status["compiled_cache"]
+            for result, count in (("hit", compiled["hits"]), ("miss", compiled["misses"])):
+                samples.append(("db_compiled_cache_lookups_total", "counter", "Compiled query cache lookups", {"engine": engine, "result": result}, count))
+            prepared = status["prepared_statements"]
+            if prepared is not None:
+                samples.append(("db_statement_executions_total", "counter", "Statements executed through asyncpg", {"engine": engine}, prepared["executions"]))
+                samples.append(("db_statements_prepared_total", "counter", "Statements prepared on the server (prepared statement cache misses)", {"engine": engine}, prepared["prepared"]))
+
+    samples.append(("log_records_dropped_total", "counter", "Log records dropped because the log queue was full", {}, dropped_records()))
+
+    password_hasher = getattr(app.state, "password_hasher", None)
+    if password_hasher is not None:
+        hashing = password_hasher.stats()
+        samples.append(("password_hash_in_flight", "gauge", "Password hashes running or queued", {}, hashing["in_flight"]))
+        samples.append(("password_hash_rejected_total", "counter", "Password hashes rejected at capacity", {}, hashing["rejected"]))
+
+    mailer = getattr(app.state, "mailer", None)
+    if mailer is not None and mailer.enabled:
+        for outcome in ("sent", "retried", "failed", "dropped"):
+            samples.append(("email_messages_total", "counter", "Emails by delivery outcome", {"outcome": outcome}, mailer.metrics[outcome]))
+    return samples
@@ -0,0 +1,250 @@
+"""Password hashing on a dedicated, bounded worker pool.
+
+scrypt is deliberately CPU and memory heavy, so hashes never run on the event
+loop or on Starlette's shared threadpool. At most ``workers`` hashes run at
+once and ``queue_size`` more may wait; anything beyond that is rejected with
+PasswordHasherBusy so a signup burst turns into quick 503s instead of stalling
+every other route.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import EnvironmentOption, HashExecutor, Settings
+
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+class ScryptParameters:
+    """scrypt cost parameters; memory use per hash is about 128 * n * r bytes"""
+
+    __slots__ = ("n", "r", "p")
+
+    def __init__(self, n: int, r: int, p: int):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @property
+    def maxmem(self) -> int:
+        return 2 * 128 * self.n * self.r + 1024 * 1024
+
+    def as_dict(self) -> dict:
+        return {"n": self.n, "r": self.r, "p": self.p, "memory_bytes": 128 * self.n * self.r}
+
+
+# Cheap in local so tests and reloads stay fast; production follows the OWASP
+# scrypt recommendation of N=2^16, r=8, p=2 (64 MiB per hash)
+PASSWORD_HASH_PROFILES: Dict[EnvironmentOption, ScryptParameters] = {
+    EnvironmentOption.LOCAL: ScryptParameters(n=2**10, r=8, p=1),
+    EnvironmentOption.STAGING: ScryptParameters(n=2**14, r=8, p=1),
+    EnvironmentOption.PRODUCTION: ScryptParameters(n=2**16, r=8, p=2),
+}
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.b64encode(value).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def _scrypt(password: str, salt: bytes, params: ScryptParameters) -> bytes:
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=params.n,
+        r=params.r,
+        p=params.p,
+        maxmem=params.maxmem,
+        dklen=HASH_BYTES,
+    )
+
+
+def hash_password(password: str, params: ScryptParameters) -> str:
+    """Encode a password as ``scrypt$n$r$p$salt$hash``"""
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, params)
+    return f"scrypt${params.n}${params.r}${params.p}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check a password against a hash produced by hash_password"""
+    try:
+        scheme, n, r, p, salt, digest = encoded.split("$")
+        if scheme != "scrypt":
+            return False
+        params = ScryptParameters(n=int(n), r=int(r), p=int(p))
+        expected = _b64decode(digest)
+        actual = _scrypt(password, _b64decode(salt), params)
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+# Executor entry points; module level so process pools can pickle them
+
+def _timed_hash(passwords: List[str], params: ScryptParameters) -> Tuple[List[str], float]:
+    started = time.perf_counter()
+    hashes = [hash_password(password, params) for password in passwords]
+    return hashes, time.perf_counter() - started
+
+
+def _timed_verify(password: str, encoded: str) -> Tuple[bool, float]:
+    started = time.perf_counter()
+    return verify_password(password, encoded), time.perf_counter() - started
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Every worker is busy and the wait queue is full"""
+
+
+class PasswordHasher:
+    """Runs password hashes on its own pool with admission control and metrics"""
+
+    def __init__(
+        self,
+        params: ScryptParameters,
+        workers: int,
+        queue_size: int,
+        executor: HashExecutor = HashExecutor.THREAD,
+    ):
+        self.params = params
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor_kind = executor
+        if executor == HashExecutor.PROCESS:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.in_flight = 0
+        self.metrics = {
+            "hashed": 0,
+            "verified": 0,
+            "completed": 0,
+            "rejected": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PasswordHasher":
+        return cls(
+            params=PASSWORD_HASH_PROFILES[settings.ENVIRONMENT],
+            workers=settings.PASSWORD_HASH_WORKERS,
+            queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+            executor=settings.PASSWORD_HASH_EXECUTOR,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """Admitted jobs still waiting for a worker"""
+        return max(0, self.in_flight - self.workers)
+
+    def _release(self, _future):
+        self.in_flight -= 1
+
+    async def _run(self, function, *args):
+        if self.in_flight >= self.workers + self.queue_size:
+            self.metrics["rejected"] += 1
+            raise PasswordHasherBusy("password hashing capacity exhausted")
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue_depth)
+        future = self._executor.submit(function, *args)
+        # Slots are freed when the work finishes, not when a caller gives up
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._release, done))
+
+        started = time.perf_counter()
+        try:
+            result, elapsed = await asyncio.wrap_future(future)
+        except Exception:
+            self.metrics["failures"] += 1
+            raise
+        waited = max(0.0, time.perf_counter() - started - elapsed)
+        self.metrics["completed"] += 1
+        self.metrics["hash_seconds_total"] += elapsed
+        self.metrics["hash_seconds_max"] = max(self.metrics["hash_seconds_max"], elapsed)
+        self.metrics["wait_seconds_total"] += waited
+        self.metrics["wait_seconds_max"] = max(self.metrics["wait_seconds_max"], waited)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash one password; raises PasswordHasherBusy when over capacity"""
+        hashes = await self._run(_timed_hash, [password], self.params)
+        self.metrics["hashed"] += 1
+        return hashes[0]
+
+    async def hash_many(self, passwords: List[str], chunk_size: Optional[int] = None) -> List[str]:
+        """Hash a batch as jobs of at most ``chunk_size`` passwords, in order.
+
+        Without ``chunk_size`` the batch is split evenly across the workers.
+        At most ``workers`` jobs of one batch are admitted at a time, so a
+        bulk import can use the whole pool but only queues behind itself;
+        raises PasswordHasherBusy when a job is rejected.
+        """
+        if not passwords:
+            return []
+        if chunk_size is None:
+            chunk_size = math.ceil(len(passwords) / self.workers)
+        chunk_size = max(1, chunk_size)
+        chunks = [passwords[start:start + chunk_size] for start in range(0, len(passwords), chunk_size)]
+        slots = asyncio.Semaphore(self.workers)
+
+        async def hash_chunk(chunk: List[str]) -> List[str]:
+            async with slots:
+                return await self._run(_timed_hash, chunk, self.params)
+
+        results = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        hashes = [password_hash for chunk in results for password_hash in chunk]
+        self.metrics["hashed"] += len(hashes)
+        return hashes
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        """Check a password off the event loop; raises PasswordHasherBusy when over capacity"""
+        matched = await self._run(_timed_verify, password, encoded)
+        self.metrics["verified"] += 1
+        return matched
+
+    def shutdown(self):
+        """Stop the pool, dropping queued jobs"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        metrics = self.metrics
+        jobs = metrics["completed"]
+        return {
+            "executor": self.executor_kind.value,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "parameters": self.params.as_dict(),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "hashed": metrics["hashed"],
+            "verified": metrics["verified"],
+            "rejected": metrics["rejected"],
+            "failures": metrics["failures"],
+            "max_queue_depth": metrics["max_queue_depth"],
+            "mean_hash_ms": round(metrics["hash_seconds_total"] / jobs * 1000, 3) if jobs else 0.0,
+            "max_hash_ms": round(metrics["hash_seconds_max"] * 1000, 3),
+            "mean_wait_ms": round(metrics["wait_seconds_total"] / jobs * 1000, 3) if jobs else 0.0,
+            "max_wait_ms": round(metrics["wait_seconds_max"] * 1000, 3),
+        }
@@ -0,0 +1,185 @@
+"""On-demand sampling profiler for a running worker.
+
+A background thread reads every thread's current Python stack at a fixed
+interval (``sys._current_frames``), so the profiled code runs untouched and the
+cost is one stack walk per thread per sample. The event loop thread shows the
+async handler running at that moment; threadpool threads show sync handlers
+and dependencies. Idle threads (waiting on a lock, queue or selector) are left
+out. Results are collapsed stacks (``frame;frame;frame count``), the input
+format of flamegraph.pl, speedscope and similar tools.
+
+With a request fraction only samples taken while a sampled request runs are
+kept: event loop samples when a sampled request's task is the one running,
+threadpool samples while any sampled request is in flight.
+"""
+
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional, Set
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+# Leaf frames of threads that are blocked waiting rather than running code;
+# worker loops appear as the leaf only while blocked on their C-level queue
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("connection.py", "wait"),
+    ("thread.py", "_worker"),  # concurrent.futures pools (asyncio.to_thread, password hashing)
+    ("core.py", "_connection_worker_thread"),  # aiosqlite (local SQLite only)
+}
+
+MAX_STACK_DEPTH = 128
+
+# Numbered thread names ("Thread-3", "asyncio_0") collapse into one root frame
+THREAD_NUMBER = re.compile(r"[-_]\d+")
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already running on this worker"""
+
+
+def _path_prefixes():
+    prefixes = {os.path.abspath(path) for path in sys.path if path} | {os.getcwd()}
+    return sorted((prefix + os.sep for prefix in prefixes), key=len, reverse=True)
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread in this process on request"""
+
+    def __init__(self):
+        self.request_fraction = 0.0
+        self.installed = False
+        self._tracked: Set[asyncio.Task] = set()
+        self._running = False
+        self._labels: Dict[object, str] = {}
+        self._prefixes = None
+
+    def _short_path(self, filename: str) -> str:
+        if self._prefixes is None:
+            self._prefixes = _path_prefixes()
+        for prefix in self._prefixes:
+            if filename.startswith(prefix):
+                return filename[len(prefix):]
+        return filename
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_qualname} ({self._short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, frame) -> Optional[str]:
+        """Root-first frame labels joined by ``;``, or None for an idle thread"""
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            return None
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+    def _sample(self, loop: asyncio.AbstractEventLoop, loop_thread: int, interval: float, stop: threading.Event, stacks: Counter):
+        own_thread = threading.get_ident()
+        request_mode = self.request_fraction > 0
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if thread_id == loop_thread:
+                    if request_mode and asyncio.current_task(loop) not in self._tracked:
+                        continue
+                    root = "event loop"
+                else:
+                    if request_mode and not self._tracked:
+                        continue
+                    root = THREAD_NUMBER.sub("", names.get(thread_id, "thread"))
+                stack = self._collapse(frame)
+                if stack is not None:
+                    stacks[f"{root};{stack}"] += 1
+
+    async def profile(self, seconds: float, interval: float = 0.01, request_fraction: float = 0.0) -> Counter:
+        """Sample for ``seconds`` and return how often each stack was seen.
+
+        Raises ProfilerBusy if a profile is already running on this worker.
+        """
+        if self._running:
+            raise ProfilerBusy("a profile is already running on this worker")
+        self._running = True
+        self.request_fraction = request_fraction
+        stacks: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(asyncio.get_running_loop(), threading.get_ident(), interval, stop, stacks),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+            self.request_fraction = 0.0
+            self._tracked.clear()
+            self._running = False
+        return stacks
+
+    def track(self, task: asyncio.Task) -> bool:
+        """Pick a request for request-sampled profiling; True if it was picked"""
+        if random.random() < self.request_fraction:
+            self._tracked.add(task)
+            return True
+        return False
+
+    def untrack(self, task: asyncio.Task):
+        self._tracked.discard(task)
+
+
+def collapsed(stacks: Counter) -> str:
+    """Collapsed stack text, most frequent stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# Profiler for this worker process
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that marks requests picked for request-sampled profiling.
+
+    Only installed with PROFILING_ENABLED; outside a request-sampled profile
+    it costs one attribute check per request.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+        profiler.installed = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.profiler.request_fraction:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        if not self.profiler.track(task):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.untrack(task)
@@ -1,4 +1,206 @@
+"""Rate limiting shared across workers through Redis token leases.
+
+Each worker leases a small batch of tokens for a limit window from Redis with
+an atomic Lua script and spends them locally, so most allowed requests never
+leave the process. A worker can never spend more than it was granted, so the
+configured limit holds across every worker and node. Exhausted windows are
+remembered locally until they reset, which keeps floods of rejected requests
+off Redis as well.
+
+slowapi checks limits synchronously inside async routes, so those use
+``limit()`` instead of ``limiter.limit()`` to keep the Redis round trip off
+the event loop.
+"""
+
+import functools
+import threading
+import time
+
+from limits import RateLimitItem, parse
+from limits.storage import RedisStorage
+from limits.strategies import STRATEGIES, FixedWindowRateLimiter
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+
+# KEYS[1] window counter; ARGV: limit, window seconds, tokens wanted.
+# Returns {tokens granted, milliseconds until the window resets}.
+LEASE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local wanted = tonumber(ARGV[3])
+local used = tonumber(redis.call("get", KEYS[1]) or "0")
+local granted = math.min(wanted, limit - used)
+if granted <= 0 then
+    return {0, redis.call("pttl", KEYS[1])}
+end
+if redis.call("incrby", KEYS[1], granted) == granted then
+    redis.call("expire", KEYS[1], ARGV[2])
+end
+return {granted, redis.call("pttl", KEYS[1])}
+"""
+
+
+class LeaseRedisStorage(RedisStorage):
+    """Redis storage that can hand out batches of tokens (``lease+redis://``)"""
+
+    STORAGE_SCHEME = ["lease+redis", "lease+rediss"]
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri.removeprefix("lease+"), **options)
+
+    def initialize_storage(self, uri: str):
+        super().initialize_storage(uri)
+        self.lua_lease = self.get_connection().register_script(LEASE_SCRIPT)
+
+    def acquire_lease(self, key: str, limit: int, expiry: int, amount: int):
+        """Atomically take up to ``amount`` tokens; returns (granted, seconds left in window)"""
+        granted, ttl_ms = self.lua_lease([self.prefixed_key(key)], [limit, expiry, amount])
+        # pttl is negative when the key is missing or has no expiry
+        return int(granted), ttl_ms / 1000 if ttl_ms > 0 else float(expiry)
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires_at", "exhausted")
+
+    def __init__(self, tokens: int, expires_at: float):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.exhausted = False
+
+
+class LeasedFixedWindowRateLimiter(FixedWindowRateLimiter):
+    """Fixed window strategy that spends locally cached token leases first.
+
+    Works with any storage: ones exposing ``acquire_lease`` (Redis) get atomic
+    batched grants, others (the in-memory fallback) are emulated with ``incr``.
+    """
+
+    MAX_CACHED_LEASES = 10_000
+
+    def __init__(self, storage, lease_size: int = None, lease_fraction: float = None):
+        super().__init__(storage)
+        settings = get_settings()
+        self.lease_size = lease_size or settings.RATE_LIMIT_LEASE_SIZE
+        self.lease_fraction = lease_fraction or settings.RATE_LIMIT_LEASE_FRACTION
+        self._leases = {}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.remote_acquisitions = 0
+        self.rejections = 0
+
+    def _batch_size(self, item: RateLimitItem, cost: int) -> int:
+        # Small limits lease one token at a time so no worker hoards the window
+        share = int(item.amount * self.lease_fraction)
+        return max(cost, min(self.lease_size, share))
+
+    def _acquire(self, key: str, item: RateLimitItem, amount: int):
+        expiry = item.get_expiry()
+        if hasattr(self.storage, "acquire_lease"):
+            return self.storage.acquire_lease(key, item.amount, expiry, amount)
+        count = self.storage.incr(key, expiry, amount=amount)
+        granted = max(0, min(amount, item.amount - (count - amount)))
+        return granted, max(0.0, self.storage.get_expiry(key) - time.time())
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, lease in self._leases.items() if lease.expires_at <= now]
+        for key in expired:
+            del self._leases[key]
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        key = item.key_for(*identifiers)
+        now = time.monotonic()
+
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.expires_at > now:
+                if lease.tokens >= cost:
+                    lease.tokens -= cost
+                    self.local_hits += 1
+                    return True
+                if lease.exhausted:
+                    self.rejections += 1
+                    return False
+
+        granted, window_left = self._acquire(key, item, self._batch_size(item, cost))
+
+        with self._lock:
+            self.remote_acquisitions += 1
+            if len(self._leases) >= self.MAX_CACHED_LEASES:
+                self._evict_expired(now)
+            lease = self._leases.get(key)
+            if lease is None or lease.expires_at <= now:
+                lease = self._leases[key] = _Lease(0, now + window_left)
+            lease.tokens += granted
+            if lease.tokens >= cost:
+                lease.tokens -= cost
+                return True
+            # Window is used up everywhere; reject locally until it resets
+            lease.exhausted = True
+            self.rejections += 1
+            return False
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        lease = self._leases.get(item.key_for(*identifiers))
+        if lease is not None and lease.expires_at > time.monotonic() and lease.tokens >= cost:
+            return True
+        return super().test(item, *identifiers, cost=cost)
+
+    def stats(self) -> dict:
+        """Local counters for this worker"""
+        return {
+            "local_hits": self.local_hits,
+            "remote_acquisitions": self.remote_acquisitions,
+            "rejections": self.rejections,
+            "cached_leases": len(self._leases),
+        }
+
+
+STRATEGIES["leased-fixed-window"] = LeasedFixedWindowRateLimiter
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=get_settings().rate_limit_storage_uri,
+    strategy="leased-fixed-window",
+    # Fall back to per-worker limits if Redis becomes unreachable
+    in_memory_fallback_enabled=True,
+)
+
+
+def hit_weighted(limit_value: str, scope: str, key: str, cost: int) -> bool:
+    """Consume ``cost`` units of a limit outside the route decorators.
+
+    For endpoints whose weight is only known while handling the request
+    (e.g. records in a bulk upload). May do network I/O, so call it from a
+    threadpool in async code.
+    """
+    if not limiter.enabled or cost <= 0:
+        return True
+    return limiter.limiter.hit(parse(limit_value), scope, key, cost=cost)
+
+
+def limit(limit_value: str, rate_limiter: Limiter = limiter):
+    """``rate_limiter.limit(limit_value)`` for async routes, checked on the threadpool.
+
+    slowapi runs the check (a Redis round trip whenever a lease runs out,
+    which for small limits is every allowed request) on the event loop. Here
+    the check runs first in a worker thread and slowapi's own check is marked
+    done, so its wrapper only adds the rate limit headers.
+    """
+
+    def decorator(func):
+        limited = rate_limiter.limit(limit_value)(func)
+
+        @functools.wraps(limited)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get("request")
+            if rate_limiter.enabled and request is not None and not getattr(request.state, "_rate_limiting_complete", False):
+                await run_in_threadpool(rate_limiter._check_request_limit, request, func, False)
+                request.state._rate_limiting_complete = True
+            return await limited(*args, **kwargs)
+
+        return wrapper
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+    return decorator
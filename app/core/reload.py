@@ -0,0 +1,111 @@
+"""Reload settings without restarting workers.
+
+A reload is triggered by SIGHUP or, when a watch interval is set, by a change
+to the env file's modification time. Values read per request (feature flags,
+validation and bulk import limits, ...) take effect immediately; engines,
+pools, logging and the rate limiter keep the configuration they were built
+with until the worker restarts.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+from typing import Awaitable, Callable, Iterable, Optional
+
+from app.core.config import Settings, SettingsProvider
+
+
+logger = logging.getLogger(__name__)
+
+ReloadHook = Callable[[Settings], Awaitable[None]]
+
+
+class SettingsReloader:
+    """Reloads a SettingsProvider on SIGHUP and env file changes, then runs hooks"""
+
+    def __init__(
+        self,
+        provider: SettingsProvider,
+        hooks: Iterable[ReloadHook] = (),
+        env_file: Optional[str] = None,
+        watch_interval: float = 0.0,
+        reload_on_sighup: bool = True,
+    ):
+        self.provider = provider
+        self.hooks = list(hooks)
+        self.env_file = env_file
+        self.watch_interval = watch_interval
+        self.reload_on_sighup = reload_on_sighup
+        self._mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._signal_installed = False
+        self._reloading = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, provider: SettingsProvider, settings: Settings, hooks: Iterable[ReloadHook] = ()) -> "SettingsReloader":
+        return cls(
+            provider,
+            hooks=hooks,
+            env_file=Settings.model_config.get("env_file"),
+            watch_interval=settings.SETTINGS_WATCH_INTERVAL,
+            reload_on_sighup=settings.SETTINGS_RELOAD_ON_SIGHUP,
+        )
+
+    def _env_file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.env_file).st_mtime
+        except (OSError, TypeError):
+            return None
+
+    async def reload(self) -> Optional[Settings]:
+        """Rebuild the settings and run the reload hooks"""
+        async with self._reloading:
+            settings = self.provider.reload()
+            if settings is None:
+                return None
+            for hook in self.hooks:
+                try:
+                    await hook(settings)
+                except Exception:
+                    logger.exception("Settings reload hook failed")
+            return settings
+
+    def _on_sighup(self):
+        logger.info("SIGHUP received, reloading settings")
+        asyncio.get_running_loop().create_task(self.reload())
+
+    async def _watch_forever(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            mtime = self._env_file_mtime()
+            if mtime != self._mtime:
+                self._mtime = mtime
+                logger.info(f"{self.env_file} changed, reloading settings")
+                await self.reload()
+
+    async def start(self):
+        """Install the SIGHUP handler and start watching the env file"""
+        if self.reload_on_sighup and hasattr(signal, "SIGHUP") and not self._signal_installed:
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self._on_sighup)
+                self._signal_installed = True
+            except (NotImplementedError, RuntimeError):
+                # Not the main thread, or the loop does not support signals
+                logger.warning("Could not install the SIGHUP settings reload handler")
+        if self.watch_interval > 0 and self.env_file and self._task is None:
+            self._mtime = self._env_file_mtime()
+            self._task = asyncio.create_task(self._watch_forever())
+
+    async def stop(self):
+        """Remove the SIGHUP handler and stop watching"""
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._signal_installed = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
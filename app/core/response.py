@@ -1,13 +1,90 @@
-from typing import Any
+"""JSON responses rendered straight to bytes by the engine chosen with JSON_RESPONSE_ENGINE.
+
+Handlers return success()/error() envelopes or json_response() for other
+bodies, so FastAPI's jsonable_encoder and response validation never run on
+them. A handler that returns a plain dict still works, but goes through
+FastAPI's encoder before the selected engine renders it.
+"""
+
+import json
+from typing import Any, Type
+
 from fastapi import status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json, to_jsonable_python
+
+from app.core.config import JSONEngine
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class PydanticJSONResponse(JSONResponse):
+    """Serializes content (including Pydantic models) straight to bytes with pydantic-core"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+class ORJSONResponse(JSONResponse):
+    """Serializes content with orjson, falling back to pydantic-core for models"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=to_jsonable_python)
+
+
+class StdlibJSONResponse(JSONResponse):
+    """Serializes content with the standard library json module"""
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=to_jsonable_python,
+        ).encode("utf-8")
+
+
+class RenderedJSONResponse(Response):
+    """JSON body that is already serialized bytes; nothing is rendered per response"""
+
+    media_type = "application/json"
+
+
+RESPONSE_ENGINES = {
+    JSONEngine.PYDANTIC: PydanticJSONResponse,
+    JSONEngine.ORJSON: ORJSONResponse,
+    JSONEngine.STDLIB: StdlibJSONResponse,
+}
+
+# Response class used by success(), error() and json_response(); see set_response_engine()
+response_class: Type[JSONResponse] = PydanticJSONResponse
+
+
+def get_response_class(engine: JSONEngine) -> Type[JSONResponse]:
+    """Get the response class for a JSON engine"""
+    if engine == JSONEngine.ORJSON and orjson is None:
+        raise RuntimeError("JSON_RESPONSE_ENGINE=orjson requires the orjson package")
+    return RESPONSE_ENGINES[engine]
+
+
+def set_response_engine(engine: JSONEngine) -> Type[JSONResponse]:
+    """Select the response class used by success(), error() and json_response()"""
+    global response_class
+    response_class = get_response_class(engine)
+    return response_class
+
+
+def json_response(content: Any, status: int = status.HTTP_200_OK):
+    """Render arbitrary content with the selected response engine"""
+    return response_class(status_code=status, content=content)
 
 
 def response(status: int, success: bool, message: str, data: Any = None):
-    # Convert Pydantic models to dict for JSON serialization
-    if isinstance(data, BaseModel):
-        data = data.model_dump()
+    # Pydantic models are left as-is; the response class serializes them directly
     return {
         "status": status,
         "success": success,
@@ -22,7 +99,7 @@ def success(
     message: str = "Request Successful",
     data: Any = {},
 ):
-    return JSONResponse(
+    return response_class(
         status_code=status, content=response(status, success, message, data)
     )
 
@@ -33,6 +110,16 @@ def error(
     message: str = "Request Failed",
     data: Any = {},
 ):
-    return JSONResponse(
+    return response_class(
         status_code=status, content=response(status, success, message, data)
     )
+
+
+def render_error(status: int, message: str, data: Any = None) -> bytes:
+    """Serialize an error envelope with pydantic-core, independent of the selected engine"""
+    return to_json(response(status, False, message, data))
+
+
+def rendered_response(body: bytes, status: int) -> RenderedJSONResponse:
+    """Response for a body produced by render_error()"""
+    return RenderedJSONResponse(content=body, status_code=status)
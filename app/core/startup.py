@@ -0,0 +1,83 @@
+"""Startup phase tracking for eager and lazy worker starts.
+
+Each phase (deferred imports, engine creation, connection warm-up, the first
+dependency checks) is timed and logged so cold-start regressions show up in
+the logs and in the readiness report. A worker only counts as started once
+every phase is done, and stops counting as ready once shutdown begins.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.core.config import StartupMode
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """Times startup phases and records whether warm-up has finished"""
+
+    def __init__(self, mode: StartupMode):
+        self.mode = mode
+        self.phases: Dict[str, float] = {}
+        self.completed = False
+        self.error: Optional[str] = None
+        self.draining = False
+        self.progress: Dict[str, Dict[str, int]] = {}
+        self._started = time.perf_counter()
+        self._total_ms: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named phase; durations are kept in milliseconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.phases[name] = elapsed_ms
+            logger.info(f"Startup phase {name}: {elapsed_ms:.1f} ms")
+
+    def set_progress(self, name: str, done: int, total: int):
+        """Record progress of a phase made of countable steps"""
+        self.progress[name] = {"done": done, "total": total}
+
+    def complete(self):
+        self.completed = True
+        self._total_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        logger.info(f"Startup ({self.mode.value}) completed in {self._total_ms:.1f} ms")
+
+    def fail(self, exc: BaseException):
+        # Reported by readiness, so only the type; the message stays in the log
+        self.error = type(exc).__name__
+        logger.error(f"Startup ({self.mode.value}) failed: {self.error}: {exc}", exc_info=exc)
+
+    def begin_shutdown(self):
+        """Stop reporting ready so load balancers route new requests elsewhere"""
+        self.draining = True
+        logger.info("Shutdown started, draining in-flight requests")
+
+    @property
+    def ready(self) -> bool:
+        return self.completed and self.error is None and not self.draining
+
+    def report(self) -> dict:
+        if self.error is not None:
+            status = "failed"
+        elif self.draining:
+            status = "draining"
+        else:
+            status = "completed" if self.completed else "warming_up"
+        report = {
+            "mode": self.mode.value,
+            "status": status,
+            "total_ms": self._total_ms,
+            "phases_ms": self.phases,
+            "progress": self.progress,
+        }
+        if self.error is not None:
+            report["error"] = self.error
+        return report
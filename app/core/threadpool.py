@@ -0,0 +1,55 @@
+"""Threadpool sizing and an audit of what still runs on it.
+
+FastAPI calls plain ``def`` endpoints and dependencies through anyio's default
+thread limiter, a thread hop per call. Anything that does not block belongs in
+``async def`` so it runs directly on the event loop; the pool is then only for
+genuinely blocking work, and its size can be set to match.
+"""
+
+import logging
+from typing import Dict, List
+
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import is_async_gen_callable, is_coroutine_callable
+from fastapi.routing import APIRoute
+
+
+logger = logging.getLogger(__name__)
+
+
+def configure_threadpool(size: int):
+    """Set how many sync endpoints and dependencies may run at once; call on the event loop"""
+    from anyio.to_thread import current_default_thread_limiter
+
+    current_default_thread_limiter().total_tokens = size
+
+
+def threadpool_callables(app: FastAPI) -> Dict[str, List[str]]:
+    """Sync endpoints and dependencies (which run on the threadpool), with the routes using each"""
+    found: Dict[str, List[str]] = {}
+
+    def visit(dependant: Dependant, route: APIRoute):
+        call = dependant.call
+        if call is not None and not (is_coroutine_callable(call) or is_async_gen_callable(call)):
+            name = f"{call.__module__}.{getattr(call, '__qualname__', type(call).__name__)}"
+            routes = found.setdefault(name, [])
+            if route.path not in routes:
+                routes.append(route.path)
+        for dependency in dependant.dependencies:
+            visit(dependency, route)
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            visit(route.dependant, route)
+    return found
+
+
+def log_threadpool_callables(app: FastAPI):
+    """Log what still goes through the threadpool, so new sync handlers show up at startup"""
+    callables = threadpool_callables(app)
+    if not callables:
+        logger.info("No endpoints or dependencies run on the threadpool")
+        return
+    for name, routes in callables.items():
+        logger.info(f"Runs on the threadpool: {name} ({len(routes)} routes, e.g. {routes[0]})")
@@ -0,0 +1 @@
+"""Benchmarks for the API. Run modules with ``python -m benchmarks.<name>``"""
@@ -0,0 +1,133 @@
+"""The application under benchmark: real routes, stubbed database and probes.
+
+    uvicorn benchmarks.app:create_app --factory
+"""
+
+import itertools
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Optional
+
+from benchmarks.asgi import use_bench_environment
+
+
+class StubDatabaseManager:
+    """Stands in for DatabaseManager so benchmarks never need PostgreSQL"""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    @property
+    def sync_engine(self):
+        raise RuntimeError("Benchmarks run without a database")
+
+    @property
+    def async_engine(self):
+        raise RuntimeError("Benchmarks run without a database")
+
+    def pool_status(self) -> dict:
+        return {}
+
+    def statement_cache_status(self) -> dict:
+        return {}
+
+    @property
+    def replicas(self):
+        from app.core.db.replicas import ReplicaSet
+
+        return ReplicaSet([])
+
+    async def dispose(self, timeout=None):
+        return None
+
+
+class InMemoryUserRepository:
+    """UserRepository stand-in backed by a dict, seeded with a few pages of users"""
+
+    def __init__(self, seed: int = 500):
+        self._ids = itertools.count(1)
+        self._users = {}
+        for index in range(seed):
+            self._insert(f"First{index}", f"Last{index}", f"user{index}@example.com")
+
+    def _insert(self, fname, lname, email, password_hash=None):
+        user = SimpleNamespace(
+            id=next(self._ids), fname=fname, lname=lname, email=email,
+            password_hash=password_hash, created_at=datetime.now(timezone.utc),
+        )
+        self._users[user.id] = user
+        return user
+
+    async def list_page(self, limit, after_id=None):
+        start = (after_id or 0) + 1
+        page = [self._users[i] for i in range(start, start + limit + 1) if i in self._users]
+        if len(page) > limit:
+            return page[:limit], page[limit - 1].id
+        return page, None
+
+    async def get(self, user_id):
+        return self._users.get(user_id)
+
+    async def create(self, fname, lname, email, password_hash=None):
+        return self._insert(fname, lname, email, password_hash)
+
+    async def create_many(self, rows):
+        return {row["email"]: self._insert(**row).id for row in rows}
+
+    async def stream(self, batch_size):
+        users = list(self._users.values())
+        for start in range(0, len(users), batch_size):
+            yield users[start:start + batch_size]
+
+
+async def _healthy():
+    return None
+
+
+def create_app(rate_limits: Optional[bool] = None, response_cache: Optional[bool] = None):
+    """Import the application with stubbed dependencies.
+
+    Rate limits are off by default so load tests measure the routes rather
+    than 429s; the response cache is on. ``BENCH_RATE_LIMITS`` and
+    ``BENCH_RESPONSE_CACHE`` (``0``/``1``) set them for ``--factory`` runs.
+    Password hashing uses the cheap local parameters, so signup routes
+    measure the request path rather than scrypt.
+    """
+    use_bench_environment()
+    if rate_limits is None:
+        rate_limits = os.environ.get("BENCH_RATE_LIMITS", "0") == "1"
+    if response_cache is None:
+        response_cache = os.environ.get("BENCH_RESPONSE_CACHE", "1") == "1"
+
+    import main
+    from app.api.v1.user.repository import get_user_export, get_user_repository
+    from app.core.cache import response_cache as cache
+    from app.core.config import EnvironmentOption
+    from app.core.passwords import PASSWORD_HASH_PROFILES
+    from app.core.rate_limiter import limiter
+
+    main.db_manager = main.app.state.db_manager = StubDatabaseManager(main.settings)
+    users = InMemoryUserRepository()
+
+    async def user_repository():
+        return users
+
+    async def user_export():
+        return users.stream
+
+    main.app.dependency_overrides[get_user_repository] = user_repository
+    main.app.dependency_overrides[get_user_export] = user_export
+    main.health_monitor.probes = {name: _healthy for name in main.health_monitor.probes}
+    main.password_hasher.params = PASSWORD_HASH_PROFILES[EnvironmentOption.LOCAL]
+
+    async def warm_up():
+        # No engines to create; the stubbed probes still run for /health/ready
+        await main.health_monitor.refresh()
+        await main.health_monitor.start()
+
+    main.warm_up = warm_up
+    main.startup.complete()
+    limiter.enabled = rate_limits
+    cache.enabled = response_cache
+    return main.app
@@ -0,0 +1,53 @@
+"""Compare two benchmark reports and fail on regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any case's throughput drops, or its p99 latency
+grows, by more than ``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+
+
+def throughput(result: dict) -> float:
+    return result.get("requests_per_second") or result.get("ops_per_second") or 0.0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """Per-case rows of (name, throughput change %, p99 change %, regressed)"""
+    rows = []
+    for name, before in baseline["results"].items():
+        after = candidate["results"].get(name)
+        if after is None:
+            continue
+        throughput_change = (throughput(after) - throughput(before)) / throughput(before) * 100 if throughput(before) else 0.0
+        p99_change = (after["p99_ms"] - before["p99_ms"]) / before["p99_ms"] * 100 if before["p99_ms"] else 0.0
+        regressed = throughput_change < -threshold or p99_change > threshold
+        rows.append((name, throughput_change, p99_change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.candidate, encoding="utf-8") as file:
+        candidate = json.load(file)
+
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"{baseline.get('commit')} -> {candidate.get('commit')} ({baseline['suite']})")
+    for name, throughput_change, p99_change, regressed in rows:
+        marker = "REGRESSION" if regressed else ""
+        print(f"{name:<55} throughput {throughput_change:+7.1f}%  p99 {p99_change:+7.1f}%  {marker}")
+    sys.exit(1 if any(row[3] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
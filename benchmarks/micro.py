@@ -0,0 +1,146 @@
+"""Micro-benchmarks for the request hot path outside of routing.
+
+Covers ``create_user_dto`` validation (all errors and first error), the ``response()`` envelope and
+``success()`` rendering, and the exception handlers.
+
+    python -m benchmarks.micro --iterations 20000 --output micro.json
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.asgi import summarize, use_bench_environment
+from benchmarks.report import write_report
+
+
+def measure(func, iterations: int, allocations: int = 500) -> dict:
+    """Latency percentiles, throughput and allocations for a synchronous callable"""
+    func()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    result = summarize(latencies, time.perf_counter() - started)
+    result["ops_per_second"] = result.pop("requests_per_second")
+    result.pop("requests")
+    result["iterations"] = iterations
+
+    if allocations:
+        tracemalloc.start()
+        try:
+            peaks = []
+            for _ in range(allocations):
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                func()
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+        result["alloc_peak_bytes_per_op"] = sum(peaks) // len(peaks)
+    return result
+
+
+def build_cases() -> dict:
+    from fastapi import Request
+    from fastapi.exceptions import RequestValidationError
+    from limits import parse
+    from pydantic import ValidationError
+    from slowapi.errors import RateLimitExceeded
+    from slowapi.wrappers import Limit
+
+    from app.api.v1.user.dto import create_user_dto, validate_create_user
+    from app.core.config import Settings
+    from app.core.exception_handler import (
+        internal_server_error_handler,
+        rate_limit_exceeded_handler,
+        validation_exception_handler,
+    )
+    from app.core.response import response, success
+    from benchmarks.routes import INVALID_USER, VALID_USER
+
+    def validate_valid():
+        create_user_dto.model_validate(VALID_USER)
+
+    def validate_invalid():
+        try:
+            create_user_dto.model_validate(INVALID_USER)
+        except ValidationError:
+            pass
+
+    def validate_payload(payload, first_error):
+        def validate():
+            try:
+                validate_create_user(payload, first_error=first_error)
+            except ValidationError:
+                pass
+        return validate
+
+    bad_name = {**VALID_USER, "fname": "Jane 1"}
+
+    user = create_user_dto.model_validate(VALID_USER)
+    rows = [{"id": index, "name": f"user{index}"} for index in range(100)]
+
+    app = SimpleNamespace(state=SimpleNamespace(settings=Settings()))
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": [], "query_string": b"", "app": app})
+    try:
+        create_user_dto.model_validate(INVALID_USER)
+    except ValidationError as exc:
+        validation_error = RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()]
+        )
+    # A malformed bulk body: every record fails every field
+    flood_error = RequestValidationError([
+        {**error, "loc": ("body", index, *error["loc"][1:])}
+        for index in range(250)
+        for error in validation_error.errors()
+    ])
+    rate_limit_error = RateLimitExceeded(
+        Limit(parse("1/minute"), lambda: "bench", None, False, None, None, None, 1, False)
+    )
+    loop = asyncio.new_event_loop()
+
+    def run(handler, exc):
+        return lambda: loop.run_until_complete(handler(request, exc))
+
+    return {
+        "create_user_dto [valid]": validate_valid,
+        "create_user_dto [invalid]": validate_invalid,
+        "create_user_dto [bad name]": validate_payload(bad_name, first_error=False),
+        "create_user_dto first error [valid]": validate_payload(VALID_USER, first_error=True),
+        "create_user_dto first error [invalid]": validate_payload(INVALID_USER, first_error=True),
+        "create_user_dto first error [bad name]": validate_payload(bad_name, first_error=True),
+        "Settings.database_url_async": lambda: app.state.settings.database_url_async,
+        "response() envelope": lambda: response(200, True, "ok", user),
+        "success() [model]": lambda: success(data=user),
+        "success() [100 rows]": lambda: success(data=rows),
+        "validation_exception_handler": run(validation_exception_handler, validation_error),
+        "validation_exception_handler [1000 errors]": run(validation_exception_handler, flood_error),
+        "rate_limit_exceeded_handler": run(rate_limit_exceeded_handler, rate_limit_error),
+        "internal_server_error_handler": run(internal_server_error_handler, RuntimeError("bench")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--allocations", type=int, default=500, help="calls traced per case (0 disables)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    use_bench_environment()
+    results = {
+        name: measure(func, args.iterations, args.allocations)
+        for name, func in build_cases().items()
+        if args.filter in name
+    }
+    write_report("micro", {"iterations": args.iterations}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
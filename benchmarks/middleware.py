@@ -0,0 +1,73 @@
+"""Compare the request context layers on ``GET /api/v1/users/``.
+
+``legacy`` reproduces the former ``@app.middleware("http")`` injector, which
+runs on Starlette's BaseHTTPMiddleware; ``asgi`` is the current
+RequestContextMiddleware; ``metrics`` adds MetricsMiddleware inside it and
+``server-timing`` also writes the ``Server-Timing`` header.
+
+    python -m benchmarks.middleware --requests 5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+
+from benchmarks.asgi import run_load, use_bench_environment
+
+
+PATH = "/api/v1/users/"
+
+
+def build_app(layer: str):
+    from fastapi import FastAPI
+
+    from app.api import api
+    from app.api.v1.user.repository import get_user_repository
+    from app.core.config import get_settings
+    from app.core.context import RequestContextMiddleware
+    from app.core.metrics import Metrics, MetricsMiddleware
+    from benchmarks.app import InMemoryUserRepository, StubDatabaseManager
+
+    app = FastAPI()
+    app.state.settings = get_settings()
+    app.state.db_manager = StubDatabaseManager(app.state.settings)
+    app.include_router(api)
+    users = InMemoryUserRepository()
+
+    async def user_repository():
+        return users
+
+    app.dependency_overrides[get_user_repository] = user_repository
+
+    if layer == "legacy":
+        @app.middleware("http")
+        async def add_settings_to_request(request, call_next):
+            request.state.settings = app.state.settings
+            request.state.db_manager = app.state.db_manager
+            response = await call_next(request)
+            return response
+    else:
+        if layer != "asgi":
+            app.add_middleware(MetricsMiddleware, metrics=Metrics(), server_timing=layer == "server-timing")
+        app.add_middleware(RequestContextMiddleware)
+
+    return app
+
+
+async def main(requests: int, concurrency: int):
+    results = {}
+    for layer in ("legacy", "asgi", "metrics", "server-timing"):
+        results[layer] = await run_load(
+            build_app(layer), "GET", PATH, requests, concurrency, expected_status=200
+        )
+    print(json.dumps({"path": PATH, "concurrency": concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    use_bench_environment()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,37 @@
+"""Machine-readable benchmark reports"""
+
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(suite: str, parameters: dict, results: dict, output: Optional[str] = None) -> dict:
+    """Wrap results with run metadata and write them as JSON to a file or stdout"""
+    report = {
+        "suite": suite,
+        "commit": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
@@ -0,0 +1,72 @@
+"""Compare JSON response engines on a large list envelope.
+
+    python -m benchmarks.response --items 5000 --rounds 50
+"""
+
+import argparse
+import json
+import time
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from benchmarks.asgi import use_bench_environment
+
+use_bench_environment()
+
+from app.core.config import JSONEngine  # noqa: E402
+from app.core.response import get_response_class, response  # noqa: E402
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    email: str
+    active: bool
+    score: float
+
+
+def legacy_render(data):
+    # Former path: model_dump() into a dict, then stdlib json via JSONResponse
+    if isinstance(data, list):
+        data = [item.model_dump() for item in data]
+    return JSONResponse(content=response(200, True, "ok", data)).body
+
+
+def main(items: int, rounds: int):
+    data = [
+        Item(id=i, name=f"user{i}", email=f"user{i}@example.com", active=i % 2 == 0, score=i / 3)
+        for i in range(items)
+    ]
+    renderers = {"legacy": legacy_render}
+    for engine in JSONEngine:
+        try:
+            response_class = get_response_class(engine)
+        except RuntimeError:
+            continue
+        renderers[engine.value] = lambda data, cls=response_class: cls(
+            content=response(200, True, "ok", data)
+        ).body
+
+    results = {}
+    for name, render in renderers.items():
+        render(data)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            body = render(data)
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            "ms_per_response": round(elapsed / rounds * 1000, 3),
+            "responses_per_second": round(rounds / elapsed, 1),
+            "bytes": len(body),
+        }
+    print(json.dumps({"items": items, "rounds": rounds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    main(args.items, args.rounds)
@@ -0,0 +1,172 @@
+"""Load-test every route in ``api_v1_router`` plus ``/``, ``/health`` and the probes.
+
+In-process (default) requests go straight into the ASGI app; ``--mode
+uvicorn`` starts a real server on localhost and drives it over HTTP (needs
+``benchmarks/requirements.txt``). Results are JSON so runs can be compared
+with ``python -m benchmarks.compare``.
+
+    python -m benchmarks.routes --requests 2000 --concurrency 32 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.asgi import measure_allocations, run_load, summarize
+from benchmarks.report import write_report
+
+
+VALID_USER = {"fname": "Jane", "lname": "Doe", "email": "jane@example.com", "password": "s3cret!pass"}
+INVALID_USER = {"fname": "Jane 1", "lname": "", "email": "not-an-email", "password": "short"}
+
+# Values for path parameters and request bodies, keyed by route
+PATH_PARAMS = {"user_id": "1"}
+BODIES = {
+    ("POST", "/api/v1/users/"): [("valid", VALID_USER), ("invalid", INVALID_USER)],
+    ("POST", "/api/v1/users/bulk"): [
+        ("100 records", [{**VALID_USER, "email": f"bulk{index}@example.com"} for index in range(100)]),
+    ],
+}
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+def build_cases() -> list:
+    """(name, method, path, body) for every benchmarked route"""
+    from fastapi.routing import APIRoute
+
+    from app.api.v1 import api_v1_router
+
+    cases = [
+        ("GET /", "GET", "/", None),
+        ("GET /health", "GET", "/health", None),
+        ("GET /health/live", "GET", "/health/live", None),
+        ("GET /health/ready", "GET", "/health/ready", None),
+    ]
+    for route in api_v1_router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        template = f"/api{route.path}"
+        path = re.sub(r"{(\w+)(:\w+)?}", lambda match: PATH_PARAMS.get(match.group(1), "1"), template)
+        for method in sorted(route.methods):
+            bodies = BODIES.get((method, template))
+            if bodies is None:
+                cases.append((f"{method} {template}", method, path, None))
+            else:
+                for label, body in bodies:
+                    cases.append((f"{method} {template} [{label}]", method, path, body))
+    return cases
+
+
+async def run_asgi(cases, requests: int, concurrency: int, allocations: int) -> dict:
+    from benchmarks.app import create_app
+
+    app = create_app()
+    await app.state.health_monitor.refresh()
+
+    results = {}
+    for name, method, path, body in cases:
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = JSON_HEADERS if body is not None else []
+        result = await run_load(app, method, path, requests, concurrency, headers, payload)
+        if allocations:
+            result.update(await measure_allocations(app, method, path, allocations, headers, payload))
+        results[name] = result
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(cases, requests: int, concurrency: int, workers: int) -> dict:
+    import httpx
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.app:create_app", "--factory",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--no-access-log", "--log-level", "warning",
+        ],
+        env={**os.environ},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become ready")
+                await asyncio.sleep(0.1)
+
+            results = {}
+            for name, method, path, body in cases:
+                latencies = []
+                status_codes = Counter()
+                remaining = requests
+
+                async def worker():
+                    nonlocal remaining
+                    while remaining > 0:
+                        remaining -= 1
+                        started = time.perf_counter()
+                        response = await client.request(method, path, json=body)
+                        latencies.append(time.perf_counter() - started)
+                        status_codes[response.status_code] += 1
+
+                await client.request(method, path, json=body)
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                results[name] = summarize(latencies, time.perf_counter() - started, status_codes)
+            return results
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--allocations", type=int, default=200, help="requests traced per route (asgi mode, 0 disables)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    from benchmarks.asgi import use_bench_environment
+
+    use_bench_environment()
+    cases = [case for case in build_cases() if args.filter in case[0]]
+
+    if args.mode == "asgi":
+        results = asyncio.run(run_asgi(cases, args.requests, args.concurrency, args.allocations))
+    else:
+        results = asyncio.run(run_uvicorn(cases, args.requests, args.concurrency, args.workers))
+
+    write_report(
+        "routes",
+        {"mode": args.mode, "requests": args.requests, "concurrency": args.concurrency, "workers": args.workers},
+        results,
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
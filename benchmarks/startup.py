@@ -0,0 +1,112 @@
+"""Cold-start benchmark: fresh interpreters importing the application.
+
+    python -m benchmarks.startup --runs 20 --modules 25 --output startup.json
+
+Each run starts a new Python process, so nothing is shared between runs. For
+each ``STARTUP_MODE`` it reports the whole process lifetime, the time to
+``import main`` (when the worker can start listening), the time to load what
+lazy mode deferred (routers and the database layer) and the time spent
+constructing ``Settings``. ``--modules`` adds the slowest modules by
+cumulative import time, from ``python -X importtime``.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.asgi import BENCH_ENVIRONMENT, summarize
+from benchmarks.report import write_report
+
+
+CHILD = """
+import json, time
+from pydantic_settings import BaseSettings
+settings_seconds = []
+original_init = BaseSettings.__init__
+def timed_init(self, *args, **kwargs):
+    call_started = time.perf_counter()
+    original_init(self, *args, **kwargs)
+    settings_seconds.append(time.perf_counter() - call_started)
+BaseSettings.__init__ = timed_init
+import_started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - import_started
+load_started = time.perf_counter()
+main.import_deferred_modules()
+main.load_application()
+print(json.dumps({
+    "import_main": import_seconds,
+    "load_deferred": time.perf_counter() - load_started,
+    "settings": sum(settings_seconds),
+    "settings_constructed": len(settings_seconds),
+}))
+"""
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(mode: str) -> dict:
+    environment = {**BENCH_ENVIRONMENT, **os.environ, "STARTUP_MODE": mode}
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    timings["modules"] = {
+        match.group(4): int(match.group(2)) / 1_000_000
+        for match in map(IMPORT_TIME_LINE.match, completed.stderr.splitlines())
+        if match
+    }
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mode", choices=["eager", "lazy", "both"], default="both")
+    parser.add_argument("--modules", type=int, default=0, help="report the N slowest modules to import")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    modes = ["eager", "lazy"] if args.mode == "both" else [args.mode]
+    results = {}
+    for mode in modes:
+        run_once(mode)  # warm the OS file cache and bytecode
+        runs = [run_once(mode) for _ in range(args.runs)]
+        for name in ("process", "import_main", "load_deferred", "settings"):
+            samples = [run[name] for run in runs]
+            result = summarize(samples, sum(samples))
+            result["starts_per_second"] = result.pop("requests_per_second")
+            result.pop("requests")
+            results[f"{mode} {name}"] = result
+        results[f"{mode} settings"]["constructed_per_start"] = runs[0]["settings_constructed"]
+
+        if args.modules:
+            module_samples = defaultdict(list)
+            for run in runs:
+                for module, seconds in run["modules"].items():
+                    module_samples[module].append(seconds)
+            slowest = sorted(module_samples.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+            results[f"{mode} modules"] = {
+                module: round(statistics.median(samples) * 1000, 3)
+                for module, samples in slowest[:args.modules]
+            }
+    write_report("startup", {"runs": args.runs, "modes": modes}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
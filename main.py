@@ -1,20 +1,129 @@
-from fastapi import FastAPI
+import asyncio
+import importlib
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from slowapi.errors import RateLimitExceeded
 
-from app.api import register_routers
-from app.core.config import Settings
-from app.core.db.database import initialize_database
+from app.core.cache import response_cache
+from app.core.compression import CompressionMiddleware
+from app.core.config import Settings, StartupMode, settings_provider
+from app.core.context import RequestContextMiddleware, in_flight
+from app.core.health import build_health_monitor, build_probes
 from app.core.logging import configure_logging, LogLevels
+from app.core.mail import Mailer
+from app.core.metrics import MetricsMiddleware, install_query_hooks, metrics
+from app.core.passwords import PasswordHasher
+from app.core.profiler import ProfilingMiddleware
 from app.core.exception_handler import (
     rate_limit_exceeded_handler,
     validation_exception_handler,
     internal_server_error_handler,
 )
 from app.core.rate_limiter import limiter
+from app.core.reload import SettingsReloader
+from app.core.response import json_response, render_error, rendered_response, set_response_engine
+from app.core.startup import StartupTracker
+from app.core.threadpool import configure_threadpool, log_threadpool_callables
+
+# Settings are built once per process and shared with every module
+settings = settings_provider.get()
+
+# Response class for envelopes and plain route returns
+response_class = set_response_engine(settings.JSON_RESPONSE_ENGINE)
+
+# Phase timings for this worker's startup
+startup = StartupTracker(settings.STARTUP_MODE)
+
+# Routers and the database layer (SQLAlchemy, email-validator, every
+# controller) dominate import time; lazy startup imports them during warm-up
+DEFERRED_MODULES = ("app.core.db.database", "app.api")
+
+logger = logging.getLogger(__name__)
+
+
+def import_deferred_modules():
+    """Import the heavy modules, timing each one"""
+    for name in DEFERRED_MODULES:
+        with startup.phase(f"import {name}"):
+            importlib.import_module(name)
+
+
+async def warm_up():
+    """Load anything deferred, create the engines and run the first dependency checks"""
+    try:
+        if db_manager is None:
+            # Off the event loop, so liveness keeps answering while modules load
+            await asyncio.to_thread(import_deferred_modules)
+            load_application()
+
+        with startup.phase("create engines"):
+            db_manager.async_engine
+            db_manager.replicas
+        # Pre-open pooled connections so the first requests after a deploy don't pay for them
+        with startup.phase("warm connections"):
+            try:
+                await db_manager.warm_up(
+                    settings.DB_POOL_WARM_CONNECTIONS,
+                    progress=lambda done, total: startup.set_progress("database connections", done, total),
+                )
+            except Exception:
+                logger.warning("Could not pre-open database connections", exc_info=True)
+        if settings.is_development:
+            # Local convenience; staging and production manage the schema explicitly
+            with startup.phase("create tables"):
+                try:
+                    await db_manager.create_tables()
+                except Exception:
+                    logger.warning("Could not create database tables", exc_info=True)
+        # Pings the database and Redis, and measures replica lag before any read is routed
+        with startup.phase("dependency checks"):
+            await asyncio.gather(health_monitor.refresh(), db_manager.replicas.check())
+        await health_monitor.start()
+        await db_manager.replicas.start()
+        try:
+            await mailer.start()
+        except Exception:
+            logger.warning("Could not start email delivery", exc_info=True)
+        log_threadpool_callables(app)
+    except Exception as exc:
+        startup.fail(exc)
+        return
+    startup.complete()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints and dependencies share these threads; async ones never use them
+    configure_threadpool(settings.THREADPOOL_SIZE)
+    await app.state.settings_reloader.start()
+    if settings.STARTUP_MODE == StartupMode.LAZY:
+        # Start serving (liveness) right away; readiness waits for the warm-up
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        warm_up_task = None
+        await warm_up()
+    yield
+    await shut_down(warm_up_task)
+
+
+async def shut_down(warm_up_task=None):
+    """Stop reporting ready, let in-flight requests finish, then close every connection"""
+    startup.begin_shutdown()
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    if not await in_flight.wait_idle(settings.SHUTDOWN_DRAIN_TIMEOUT):
+        logger.warning(f"{in_flight.count} requests still in flight after {settings.SHUTDOWN_DRAIN_TIMEOUT}s")
+    await app.state.settings_reloader.stop()
+    await app.state.health_monitor.stop()
+    app.state.password_hasher.shutdown()
+    # After the requests that queue mail, before the connections it may need
+    await app.state.mailer.stop(settings.EMAIL_DRAIN_TIMEOUT)
+    if db_manager is not None:
+        await db_manager.dispose(settings.DB_DISPOSE_TIMEOUT)
 
-# Initialize settings
-settings = Settings()
 
 # Create FastAPI app with settings
 app = FastAPI(
@@ -22,18 +131,69 @@ app = FastAPI(
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
     debug=settings.is_development,
+    default_response_class=response_class,
+    lifespan=lifespan,
 )
 
 # Make settings available throughout the app
 app.state.settings = settings
+app.state.startup = startup
+
+# Negotiated gzip/brotli/zstd; innermost, so latency metrics include compression time
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency and database time; inside the request context, which collects query counts
+metrics.enabled = settings.METRICS_ENABLED
+app.add_middleware(MetricsMiddleware, metrics=metrics, server_timing=settings.server_timing_enabled)
+
+# Marks requests for request-sampled profiling; only installed when profiling is enabled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Make settings accessible in request dependencies (pure ASGI, no body proxying)
+app.add_middleware(RequestContextMiddleware)
+
+# Database manager; created by load_application()
+db_manager = None
 
-# Initialize database with settings
-db_manager = initialize_database(settings)
-app.state.db_manager = db_manager
+
+async def apply_reloaded_settings(new_settings: Settings):
+    """Publish reloaded settings and drop responses rendered with the old ones"""
+    app.state.settings = new_settings
+    await response_cache.clear()
+
+
+# Reload on SIGHUP or env file change
+app.state.settings_reloader = SettingsReloader.from_settings(
+    settings_provider, settings, hooks=[apply_reloaded_settings]
+)
+
+# Dependency probes refreshed in the background; probes are added by load_application()
+health_monitor = build_health_monitor(settings)
+app.state.health_monitor = health_monitor
+
+# CPU-heavy password hashing on its own bounded pool
+password_hasher = PasswordHasher.from_settings(settings)
+app.state.password_hasher = password_hasher
+
+# Email is queued by request handlers and sent by background workers
+mailer = Mailer.from_settings(settings)
+app.state.mailer = mailer
 
 # Logger Initiation - use settings for log level
 log_level = LogLevels.debug if settings.is_development else LogLevels.info
-configure_logging(log_level=log_level, log_to_file=True)
+configure_logging(
+    log_level=log_level,
+    log_to_file=True,
+    log_file=settings.LOG_FILE,
+    rotation=settings.LOG_ROTATION,
+    max_bytes=settings.LOG_MAX_BYTES,
+    rotate_when=settings.LOG_ROTATE_WHEN,
+    backup_count=settings.LOG_BACKUP_COUNT,
+    json_format=settings.LOG_JSON,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+)
 
 # Rate Limiter
 app.state.limiter = limiter
@@ -47,25 +207,83 @@ app.add_exception_handler(500, internal_server_error_handler)
 
 
 @app.get("/")
-def root():
-    return {
+async def root():
+    settings = app.state.settings
+    return json_response({
         "message": "kelvin is a top tier swe and probably debugging this server rn. 🚀",
         "app_name": settings.APP_NAME,
         "version": settings.APP_VERSION,
         "environment": settings.ENVIRONMENT.value,
         "feature_x_enabled": settings.FEATURE_X_ENABLED
-    }
+    })
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint with settings info"""
-    return {
+    settings = app.state.settings
+    return json_response({
         "status": "healthy",
         "environment": settings.ENVIRONMENT.value,
         "version": settings.APP_VERSION,
-        "database_connected": False,  # TODO: Add actual database health check
-    }
+        "database_connected": health_monitor.is_healthy("database"),
+    })
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the worker is up and serving requests"""
+    return json_response({"status": "alive"})
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: warm-up finished and the cached dependency checks pass"""
+    report = health_monitor.report()
+    report["startup"] = startup.report()
+    if not startup.ready:
+        report["status"] = report["startup"]["status"]
+    ready = startup.ready and health_monitor.ready
+    return json_response(report, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+WARMING_UP_BODY = render_error(status.HTTP_503_SERVICE_UNAVAILABLE, "Service is starting, please retry shortly")
+
+
+async def warming_up(request: Request):
+    """Stands in for the API routes until a lazy startup has loaded them"""
+    response = rendered_response(WARMING_UP_BODY, status.HTTP_503_SERVICE_UNAVAILABLE)
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+def load_application():
+    """Create the database manager and register the API routers; runs once"""
+    global db_manager
+    if db_manager is not None:
+        return
+    from app.api import register_routers
+    from app.core.db.database import initialize_database
+
+    db_manager = initialize_database(settings)
+    app.state.db_manager = db_manager
+    if settings.METRICS_ENABLED:
+        install_query_hooks()
+    health_monitor.probes = build_probes(settings, db_manager)
+
+    app.router.routes[:] = [route for route in app.router.routes if getattr(route, "endpoint", None) is not warming_up]
+    register_routers(app)
+    # Regenerate the schema with the routes that were just added
+    app.openapi_schema = None
 
 
-register_routers(app)
+if settings.STARTUP_MODE == StartupMode.LAZY:
+    app.add_api_route(
+        "/api/{path:path}",
+        warming_up,
+        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"],
+        include_in_schema=False,
+    )
+else:
+    import_deferred_modules()
+    load_application()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+from starlette.requests import Request
+
+from app.api.v1.user import bulk
+from app.api.v1.user.bulk import BulkBodyTooLarge, BulkUserImport, iter_records
+
+
+def make_request(body: bytes, content_type: str = "application/json", chunk_size: int = 64, content_length: bool = False) -> Request:
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)] or [b""]
+    headers = [(b"content-type", content_type.encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def record(index: int) -> dict:
+    return {"fname": "Ann", "lname": "Lee", "email": f"user{index}@example.com", "password": "abc123!!x"}
+
+
+class FakeHasher:
+    async def hash_many(self, passwords, chunk_size=None):
+        return [f"hash:{password}" for password in passwords]
+
+
+class FlakyUsers:
+    """Inserts succeed until ``fail_on`` (a 1-based batch number)"""
+
+    def __init__(self, fail_on: int):
+        self.fail_on = fail_on
+        self.batches = 0
+        self.next_id = 1
+
+    async def create_many(self, rows):
+        self.batches += 1
+        if self.batches == self.fail_on:
+            raise OperationalError("INSERT", {}, ConnectionError("connection lost"))
+        ids = {}
+        for row in rows:
+            ids[row["email"]] = self.next_id
+            self.next_id += 1
+        return ids
+
+
+class PickyUsers(FlakyUsers):
+    """Rejects any statement containing a row whose email is in ``bad``, like a failed column constraint"""
+
+    def __init__(self, bad):
+        super().__init__(fail_on=0)
+        self.bad = set(bad)
+
+    async def create_many(self, rows):
+        if any(row["email"] in self.bad for row in rows):
+            self.batches += 1
+            raise DataError("INSERT", {}, ValueError("value too long for type character varying(100)"))
+        return await super().create_many(rows)
+
+
+def bulk_import(users, batch_size=2) -> BulkUserImport:
+    return BulkUserImport(
+        users,
+        FakeHasher(),
+        client_key="tests",
+        batch_size=batch_size,
+        max_records=100,
+        rate_limit="1000/minute",
+    )
+
+
+def test_failed_batch_keeps_the_committed_results():
+    async def records():
+        for index in range(6):
+            yield record(index)
+
+    summary = asyncio.run(bulk_import(FlakyUsers(fail_on=2)).run(records()))
+    statuses = [result["status"] for result in summary["results"]]
+    assert statuses == ["created", "created", "error", "error"]
+    assert summary["created"] == 2
+    assert summary["error"] == 2
+    assert summary["stopped_early"]
+
+
+def test_rejected_row_fails_alone():
+    async def records():
+        for index in range(8):
+            yield record(index)
+
+    users = PickyUsers(bad={"user2@example.com"})
+    summary = asyncio.run(bulk_import(users, batch_size=4).run(records()))
+    statuses = [result["status"] for result in summary["results"]]
+    assert statuses == ["created", "created", "error", "created", "created", "created", "created", "created"]
+    assert summary["created"] == 7
+    assert summary["error"] == 1
+    assert not summary["stopped_early"]
+
+
+def test_records_are_validated_off_the_event_loop_in_full_batches(monkeypatch):
+    threads = set()
+    validate = bulk.validate_create_user
+
+    def recording_validate(data, first_error=False):
+        threads.add(threading.current_thread())
+        return validate(data, first_error=first_error)
+
+    monkeypatch.setattr(bulk, "validate_create_user", recording_validate)
+
+    class RecordingUsers(FlakyUsers):
+        def __init__(self):
+            super().__init__(fail_on=0)
+            self.sizes = []
+
+        async def create_many(self, rows):
+            self.sizes.append(len(rows))
+            return await super().create_many(rows)
+
+    async def records():
+        for index in range(25):
+            yield {**record(index), "fname": "Ann 1"} if index % 3 == 0 else record(index)
+
+    users = RecordingUsers()
+    summary = asyncio.run(bulk_import(users, batch_size=4).run(records()))
+    assert summary["created"] == 16
+    assert summary["invalid"] == 9
+    assert users.sizes == [4, 4, 4, 4]
+    assert threading.main_thread() not in threads
+
+
+def test_json_body_over_the_limit_is_rejected_while_reading():
+    body = json.dumps([record(index) for index in range(50)]).encode()
+    with pytest.raises(BulkBodyTooLarge):
+        asyncio.run(collect(iter_records(make_request(body), max_body_bytes=1024, max_line_bytes=1024)))
+
+
+def test_declared_content_length_over_the_limit_is_rejected_up_front():
+    body = b"\n".join(json.dumps(record(index)).encode() for index in range(50))
+    request = make_request(body, "application/x-ndjson", content_length=True)
+    with pytest.raises(BulkBodyTooLarge):
+        asyncio.run(collect(iter_records(request, max_body_bytes=1024, max_line_bytes=1024)))
+
+
+def test_overlong_ndjson_line_is_one_invalid_record():
+    lines = [json.dumps(record(0)), "x" * 5000, json.dumps(record(1))]
+    request = make_request("\n".join(lines).encode(), "application/x-ndjson", chunk_size=100)
+    records = asyncio.run(collect(iter_records(request, max_body_bytes=1 << 20, max_line_bytes=1024)))
+    assert records[0] == record(0)
+    assert records[1].message == "line longer than 1024 bytes"
+    assert records[2] == record(1)
+    assert len(records) == 3
+
+
+def test_ndjson_without_newlines_does_not_buffer_past_the_line_limit():
+    request = make_request(b"x" * 100_000, "application/x-ndjson", chunk_size=1000)
+    records = asyncio.run(collect(iter_records(request, max_body_bytes=1 << 20, max_line_bytes=1024)))
+    assert [type(record).__name__ for record in records] == ["InvalidRecord"]
@@ -0,0 +1,40 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from app.core.compression import Compression, CompressionMiddleware
+
+
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, compression=Compression(minimum_size=100, encodings=("gzip",)))
+
+    @app.get("/size/{size}")
+    async def sized(size: int):
+        return PlainTextResponse("x" * size)
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" * 100, media_type="image/png")
+
+    return TestClient(app)
+
+
+def test_vary_is_sent_on_both_sides_of_the_size_threshold():
+    compressing = client()
+    small = compressing.get("/size/10", headers={"Accept-Encoding": "gzip"})
+    large = compressing.get("/size/1000", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert large.headers["content-encoding"] == "gzip"
+    assert small.headers["vary"] == large.headers["vary"] == "Accept-Encoding"
+
+
+def test_vary_is_sent_to_clients_without_accept_encoding():
+    response = client().get("/size/1000", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_types_that_are_never_compressed_do_not_vary():
+    response = client().get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "vary" not in response.headers
@@ -0,0 +1,34 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.core.context import RequestContextMiddleware, current_request_id
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.state.settings = Settings()
+    app.state.db_manager = None
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/id")
+    async def request_id():
+        return {"request_id": current_request_id()}
+
+    return TestClient(app)
+
+
+def test_well_formed_client_id_is_kept(client):
+    response = client.get("/id", headers={"X-Request-ID": "req-42.a_b"})
+    assert response.json()["request_id"] == response.headers["x-request-id"] == "req-42.a_b"
+
+
+@pytest.mark.parametrize("supplied", ["has space", "<script>", "a;b=c", "x" * 129, ""])
+def test_malformed_client_id_is_replaced(client, supplied):
+    response = client.get("/id", headers={"X-Request-ID": supplied})
+    request_id = response.json()["request_id"]
+    assert request_id == response.headers["x-request-id"]
+    assert request_id != supplied
+    assert len(request_id) == 32
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.core.config import Settings
+from app.core.health import OPTIONAL_PROBES, HealthMonitor, build_probes
+
+
+async def passing():
+    return None
+
+
+async def failing():
+    raise ConnectionError("refused")
+
+
+def refreshed(probes):
+    monitor = HealthMonitor(probes, interval=10, timeout=1, optional=OPTIONAL_PROBES)
+    asyncio.run(monitor.refresh())
+    return monitor
+
+
+def test_redis_is_not_probed_when_nothing_uses_it():
+    settings = Settings(RATE_LIMIT_STORAGE_URI="memory://")
+    assert not settings.redis_in_use
+    assert list(build_probes(settings, db_manager=None)) == ["database"]
+
+
+def test_redis_is_probed_when_a_component_uses_it():
+    assert Settings(RATE_LIMIT_STORAGE_URI="lease+redis://localhost:6379").redis_in_use
+    settings = Settings(RATE_LIMIT_STORAGE_URI="memory://", RESPONSE_CACHE_REDIS_ENABLED=True)
+    assert list(build_probes(settings, db_manager=None)) == ["database", "redis"]
+
+
+def test_failing_redis_is_reported_but_keeps_the_worker_ready():
+    monitor = refreshed({"database": passing, "redis": failing})
+    report = monitor.report()
+    assert monitor.ready
+    assert report["status"] == "degraded"
+    assert report["checks"]["redis"] == {**report["checks"]["redis"], "healthy": False, "required": False}
+
+
+def test_failing_database_takes_the_worker_out_of_rotation():
+    monitor = refreshed({"database": failing, "redis": passing})
+    assert not monitor.ready
+    assert monitor.report()["checks"]["database"]["required"]
+
+
+def test_not_ready_before_the_first_refresh():
+    monitor = HealthMonitor({"database": passing}, interval=10, timeout=1)
+    assert not monitor.ready
+    assert monitor.report()["status"] == "pending"
+
+
+def test_report_names_the_error_type_only(caplog):
+    async def leaky():
+        raise ConnectionError("could not connect to postgres@db.internal:5432 as user admin")
+
+    with caplog.at_level("WARNING", logger="app.core.health"):
+        monitor = refreshed({"database": leaky})
+    assert monitor.report()["checks"]["database"]["error"] == "ConnectionError"
+    assert "db.internal" not in str(monitor.report())
+    assert "db.internal" in caplog.text
@@ -0,0 +1,51 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core import idempotency
+from app.core.idempotency import IdempotencyStore, idempotent
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_store", IdempotencyStore(ttl=60, max_entries=100, max_bytes=1 << 20))
+    app = FastAPI()
+    app.state.created = 0
+
+    @app.post("/things")
+    @idempotent()
+    async def create_thing(request: Request):
+        request.app.state.created += 1
+        return {"id": request.app.state.created}
+
+    return app
+
+
+def post(app, client, key="key-1", body=b"{}"):
+    with TestClient(app, client=client) as test_client:
+        return test_client.post("/things", content=body, headers={"Idempotency-Key": key})
+
+
+def test_retry_from_the_same_client_is_replayed(app):
+    first = post(app, ("10.0.0.1", 1000))
+    retry = post(app, ("10.0.0.1", 1001))
+
+    assert retry.json() == first.json() == {"id": 1}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert app.state.created == 1
+
+
+def test_same_key_from_another_client_runs_again(app):
+    first = post(app, ("10.0.0.1", 1000))
+    other = post(app, ("10.0.0.2", 1000))
+
+    assert first.json() == {"id": 1}
+    assert other.json() == {"id": 2}
+    assert "Idempotent-Replayed" not in other.headers
+
+
+def test_reused_key_with_a_different_body_is_rejected(app):
+    post(app, ("10.0.0.1", 1000), body=b'{"a": 1}')
+    reused = post(app, ("10.0.0.1", 1000), body=b'{"a": 2}')
+
+    assert reused.status_code == 422
@@ -0,0 +1,51 @@
+import json
+import logging
+
+import pytest
+
+from app.core import logging as app_logging
+from app.core.config import LogRotation
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    yield tmp_path / "app.log"
+    app_logging._stop_listener()
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()], force=True)
+
+
+def test_json_lines_carry_the_traceback_separately(log_file):
+    app_logging.configure_logging("INFO", log_to_file=True, log_file=str(log_file), json_format=True)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("tests").exception("failed for %s", "user 1")
+    app_logging._stop_listener()
+
+    entry = json.loads(log_file.read_text().splitlines()[-1])
+    assert entry["message"] == "failed for user 1"
+    assert entry["exception"].startswith("Traceback")
+    assert "ZeroDivisionError" in entry["exception"]
+
+
+def test_text_lines_keep_the_traceback_after_the_message(log_file):
+    app_logging.configure_logging("INFO", log_to_file=True, log_file=str(log_file), rotation=LogRotation.TIME)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("tests").exception("failed")
+    app_logging._stop_listener()
+
+    text = log_file.read_text()
+    assert "ERROR: failed\nTraceback" in text
+
+
+def test_full_queue_drops_and_counts_records(log_file):
+    app_logging.configure_logging("INFO", log_to_file=True, log_file=str(log_file), queue_size=1)
+    for index in range(100):
+        logging.getLogger("tests").info("record %d", index)
+    app_logging._stop_listener()
+
+    written = len(log_file.read_text().splitlines())
+    assert app_logging.dropped_records() > 0
+    assert written + app_logging.dropped_records() == 100
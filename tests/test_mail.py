@@ -0,0 +1,211 @@
+import asyncio
+import socket
+import time
+
+import fakeredis
+import pytest
+import redis.asyncio
+from aiosmtpd.controller import Controller
+
+from app.core.mail import Mailer, MemoryEmailQueue, OutgoingEmail, RedisEmailQueue
+
+
+SENDER = "noreply@example.com"
+
+
+class RecordingHandler:
+    """Accepts every message unless ``replies`` holds a canned reply for the next one"""
+
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.received = []
+        self.attempts = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts.append(time.monotonic())
+        if self.replies:
+            return self.replies.pop(0)
+        self.received.append(envelope.rcpt_tos[0])
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def mailer(smtp_server, queue=None, workers=1, batch_size=5, max_attempts=5, retry_backoff=0.2) -> Mailer:
+    return Mailer(
+        connection={"host": smtp_server.hostname, "port": smtp_server.port},
+        sender=SENDER,
+        queue=queue or MemoryEmailQueue(max_size=100),
+        workers=workers,
+        batch_size=batch_size,
+        max_attempts=max_attempts,
+        retry_backoff=retry_backoff,
+    )
+
+
+async def send_all(mail: Mailer, count: int):
+    for index in range(count):
+        assert await mail.send(f"user{index}@example.com", "Welcome", "Hello")
+
+
+async def wait_until(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_batches_reuse_one_connection(smtp_server):
+    mail = mailer(smtp_server, batch_size=5)
+
+    async def run():
+        await send_all(mail, 12)
+        await mail.start()
+        await wait_until(lambda: mail.metrics["sent"] == 12)
+        await send_all(mail, 3)
+        await wait_until(lambda: mail.metrics["sent"] == 15)
+        stats = await mail.stats()
+        await mail.stop(timeout=5)
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["connections_opened"] == 1
+    # 5 + 5 + 2 queued before start, then the late 3 as a fourth batch
+    assert mail.metrics["batches"] == 4
+    assert len(smtp_server.handler.received) == 15
+
+
+def test_transient_reply_is_retried_with_backoff(smtp_server):
+    smtp_server.handler.replies = ["451 Try again later"]
+    mail = mailer(smtp_server, retry_backoff=0.2)
+
+    async def run():
+        await send_all(mail, 1)
+        await mail.start()
+        await wait_until(lambda: mail.metrics["sent"] == 1)
+        await mail.stop(timeout=5)
+
+    asyncio.run(run())
+
+    first, second = smtp_server.handler.attempts
+    # The first retry waits retry_backoff, jittered by 0.5-1.5x
+    assert second - first >= 0.1
+    assert mail.metrics["retried"] == 1
+    assert mail.metrics["failed"] == 0
+    assert smtp_server.handler.received == ["user0@example.com"]
+
+
+def test_permanent_reply_is_dropped(smtp_server):
+    smtp_server.handler.replies = ["550 No such user"]
+    mail = mailer(smtp_server)
+
+    async def run():
+        await send_all(mail, 2)
+        await mail.start()
+        await wait_until(lambda: mail.metrics["sent"] + mail.metrics["failed"] == 2)
+        await asyncio.sleep(0.3)
+        await mail.stop(timeout=5)
+
+    asyncio.run(run())
+
+    assert len(smtp_server.handler.attempts) == 2
+    assert mail.metrics["failed"] == 1
+    assert mail.metrics["retried"] == 0
+    # The rejection left the session usable for the next message
+    assert smtp_server.handler.received == ["user1@example.com"]
+    assert mail._connections[0].opened == 1
+
+
+def test_stop_drains_the_queue(smtp_server):
+    mail = mailer(smtp_server, workers=2, batch_size=4)
+
+    async def run():
+        await mail.start()
+        await send_all(mail, 25)
+        await mail.stop(timeout=10)
+
+    asyncio.run(run())
+
+    assert mail.metrics["sent"] == 25
+    assert mail.metrics["dropped"] == 0
+    assert len(smtp_server.handler.received) == 25
+
+
+@pytest.fixture
+def async_redis_pool(redis_server):
+    return redis.asyncio.ConnectionPool(connection_class=fakeredis.FakeAsyncRedisConnection, server=redis_server)
+
+
+def email_queue(pool, consumer: str) -> RedisEmailQueue:
+    return RedisEmailQueue("redis://localhost:6379", consumer=consumer, connection_pool=pool)
+
+
+def test_dead_consumer_batches_are_requeued(async_redis_pool, redis_client):
+    async def run():
+        dead = email_queue(async_redis_pool, "dead")
+        await dead.start()
+        for index in range(3):
+            await dead.put(OutgoingEmail(to=f"user{index}@example.com", subject="Welcome", body="Hello"))
+        taken = await dead.get_batch(2, timeout=1)
+        # The process dies mid-batch: no close(), and its heartbeat lapses
+        dead._heartbeat.cancel()
+        await dead.redis.delete(dead.heartbeat_key)
+
+        survivor = email_queue(async_redis_pool, "survivor")
+        await survivor.start()
+        depth = await survivor.depth()
+        batch = await survivor.get_batch(10, timeout=1)
+        await survivor.done(batch)
+        await survivor.close()
+        return taken, depth, batch
+
+    taken, depth, batch = asyncio.run(run())
+
+    assert len(taken) == 2
+    assert depth == 3
+    assert sorted(message.to for message in batch) == [f"user{index}@example.com" for index in range(3)]
+    assert redis_client.llen("email:processing:dead") == 0
+    assert redis_client.llen("email:processing:survivor") == 0
+
+
+def test_retry_and_done(async_redis_pool, redis_client):
+    async def run():
+        queue = email_queue(async_redis_pool, "worker")
+        await queue.start()
+        await queue.put(OutgoingEmail(to="user@example.com", subject="Welcome", body="Hello"))
+        [message] = await queue.get_batch(5, timeout=1)
+        message.attempts += 1
+        await queue.retry(message, delay=0.2)
+        waiting = (redis_client.llen("email:processing:worker"), redis_client.zcard("email:retry"))
+
+        # Not due yet
+        early = await queue.get_batch(5, timeout=0.05)
+        await asyncio.sleep(0.25)
+        [retried] = await queue.get_batch(5, timeout=1)
+        await queue.done([retried])
+        await queue.close()
+        return waiting, early, retried
+
+    waiting, early, retried = asyncio.run(run())
+
+    assert waiting == (0, 1)
+    assert early == []
+    assert retried.to == "user@example.com"
+    assert retried.attempts == 1
+    assert redis_client.llen("email:processing:worker") == 0
+    assert redis_client.zcard("email:retry") == 0
+    assert redis_client.llen("email:queue") == 0
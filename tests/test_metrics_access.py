@@ -0,0 +1,31 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.metrics import router
+from app.core.config import Settings
+
+
+def client(**settings) -> TestClient:
+    app = FastAPI()
+    app.state.settings = Settings(**settings)
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_open_in_local_without_a_token():
+    assert client(ENVIRONMENT="local").get("/metrics").status_code == 200
+
+
+def test_closed_outside_local_without_a_token():
+    response = client(ENVIRONMENT="production").get("/metrics")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_token_is_required_once_configured():
+    metrics = client(ENVIRONMENT="local", METRICS_TOKEN="secret")
+    assert metrics.get("/metrics").status_code == 401
+    assert metrics.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = metrics.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
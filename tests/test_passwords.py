@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.passwords import PasswordHasher, PasswordHasherBusy, ScryptParameters, verify_password
+
+
+CHEAP = ScryptParameters(n=2**4, r=1, p=1)
+
+
+def test_hash_many_splits_batches_across_workers(monkeypatch):
+    import app.core.passwords as passwords
+
+    threads = set()
+    hash_password = passwords.hash_password
+
+    def recording_hash(password, params):
+        threads.add(threading.current_thread().name)
+        return hash_password(password, params)
+
+    monkeypatch.setattr(passwords, "hash_password", recording_hash)
+    hasher = PasswordHasher(CHEAP, workers=2, queue_size=0)
+    batch = [f"password{index}" for index in range(10)]
+
+    async def run():
+        return await hasher.hash_many(batch, chunk_size=3)
+
+    hashes = asyncio.run(run())
+    hasher.shutdown()
+
+    # Results come back in order, one per password, from four jobs
+    assert len(hashes) == len(batch)
+    assert all(verify_password(password, encoded) for password, encoded in zip(batch, hashes))
+    assert hasher.metrics["completed"] == 4
+    assert hasher.metrics["rejected"] == 0
+    assert hasher.stats()["hashed"] == 10
+    assert len(threads) == 2
+
+
+def test_hash_many_defaults_to_one_job_per_worker():
+    hasher = PasswordHasher(CHEAP, workers=3, queue_size=0)
+
+    hashes = asyncio.run(hasher.hash_many([f"password{index}" for index in range(7)]))
+    hasher.shutdown()
+
+    assert len(hashes) == 7
+    assert hasher.metrics["completed"] == 3
+
+
+def test_hash_many_raises_when_the_pool_is_full():
+    hasher = PasswordHasher(CHEAP, workers=1, queue_size=0)
+
+    async def run():
+        hasher.in_flight = 1  # another request holds the only slot
+        await hasher.hash_many(["password"], chunk_size=1)
+
+    with pytest.raises(PasswordHasherBusy):
+        asyncio.run(run())
+    hasher.shutdown()
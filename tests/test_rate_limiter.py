@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.storage import MemoryStorage
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+
+from app.core import rate_limiter
+from app.core.rate_limiter import LeaseRedisStorage, LeasedFixedWindowRateLimiter, hit_weighted, limit
+
+
+@pytest.fixture
+def storage(redis_pool):
+    return LeaseRedisStorage("lease+redis://localhost:6379", connection_pool=redis_pool)
+
+
+def worker(redis_pool, lease_size=20, lease_fraction=0.05):
+    """A limiter as one uvicorn worker would build it, on the shared Redis"""
+    storage = LeaseRedisStorage("lease+redis://localhost:6379", connection_pool=redis_pool)
+    return LeasedFixedWindowRateLimiter(storage, lease_size=lease_size, lease_fraction=lease_fraction)
+
+
+def test_lease_script_grants_up_to_the_limit(storage):
+    assert storage.acquire_lease("key", 5, 60, 3)[0] == 3
+    assert storage.acquire_lease("key", 5, 60, 3)[0] == 2
+    assert storage.acquire_lease("key", 5, 60, 3)[0] == 0
+
+
+def test_lease_script_sets_the_window_once(storage, redis_client):
+    _, first_left = storage.acquire_lease("key", 5, 60, 1)
+    _, second_left = storage.acquire_lease("key", 5, 60, 1)
+    assert 59 < first_left <= 60
+    assert second_left <= first_left
+    assert 0 < redis_client.pttl(storage.prefixed_key("key")) <= 60_000
+
+
+def test_lease_returns_the_window_when_nothing_is_granted(storage):
+    storage.acquire_lease("key", 1, 60, 1)
+    granted, window_left = storage.acquire_lease("key", 1, 60, 1)
+    assert granted == 0
+    assert 0 < window_left <= 60
+
+
+def test_one_per_minute_holds_across_workers(redis_pool):
+    item = parse("1/minute")
+    workers = [worker(redis_pool) for _ in range(4)]
+    results = [limiter.hit(item, "create_user", "10.0.0.1") for limiter in workers for _ in range(3)]
+    assert results.count(True) == 1
+
+
+def test_batched_leases_never_exceed_the_limit(redis_pool):
+    item = parse("100/minute")
+    first, second = worker(redis_pool, lease_size=10, lease_fraction=0.1), worker(redis_pool, lease_size=10, lease_fraction=0.1)
+    allowed = sum(limiter.hit(item, "route", "client") for _ in range(80) for limiter in (first, second))
+    assert allowed == 100
+    # Allowed requests were mostly spent from local leases
+    assert first.remote_acquisitions + second.remote_acquisitions < 30
+
+
+def test_exhausted_window_rejects_without_redis(redis_pool, redis_server):
+    limiter = worker(redis_pool)
+    item = parse("1/minute")
+    assert limiter.hit(item, "route", "client")
+    assert not limiter.hit(item, "route", "client")
+    acquisitions = limiter.remote_acquisitions
+    redis_server.connected = False
+    assert not limiter.hit(item, "route", "client")
+    assert limiter.remote_acquisitions == acquisitions
+
+
+def test_lease_expires_with_the_window(redis_pool):
+    limiter = worker(redis_pool)
+    item = parse("2/second")
+    assert limiter.hit(item, "route", "client")
+    assert limiter.hit(item, "route", "client")
+    assert not limiter.hit(item, "route", "client")
+    time.sleep(1.1)
+    assert limiter.hit(item, "route", "client")
+
+
+def test_hit_weighted_spends_the_cost(monkeypatch):
+    limiter = LeasedFixedWindowRateLimiter(MemoryStorage())
+    monkeypatch.setattr(rate_limiter.limiter, "_limiter", limiter)
+    assert hit_weighted("10/minute", "bulk", "client", 6)
+    assert not hit_weighted("10/minute", "bulk", "client", 6)
+    assert hit_weighted("10/minute", "bulk", "client", 4)
+    assert hit_weighted("10/minute", "bulk", "client", 0)
+
+
+def test_hit_weighted_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(rate_limiter.limiter, "enabled", False)
+    assert hit_weighted("1/minute", "bulk", "client", 100)
+
+
+def test_falls_back_to_memory_when_redis_is_down(redis_pool, redis_server):
+    limiter = Limiter(
+        key_func=get_remote_address,
+        storage_uri="lease+redis://localhost:6379",
+        storage_options={"connection_pool": redis_pool},
+        strategy="leased-fixed-window",
+        in_memory_fallback_enabled=True,
+    )
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @limiter.limit("2/minute")
+    async def limited(request: Request):
+        return {"ok": True}
+
+    redis_server.connected = False
+    client = TestClient(app)
+    assert [client.get("/limited").status_code for _ in range(3)] == [200, 200, 429]
+    assert isinstance(limiter.limiter.storage, MemoryStorage)
+
+
+def test_limit_checks_off_the_event_loop(redis_pool, monkeypatch):
+    limiter = Limiter(
+        key_func=get_remote_address,
+        storage_uri="lease+redis://localhost:6379",
+        storage_options={"connection_pool": redis_pool},
+        strategy="leased-fixed-window",
+        headers_enabled=True,
+    )
+    threads = []
+    hit = LeasedFixedWindowRateLimiter.hit
+
+    def recording_hit(self, *args, **kwargs):
+        threads.append(threading.current_thread())
+        return hit(self, *args, **kwargs)
+
+    monkeypatch.setattr(LeasedFixedWindowRateLimiter, "hit", recording_hit)
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.post("/limited")
+    @limit("2/minute", limiter)
+    async def limited(request: Request):
+        return JSONResponse({"loop_thread": threading.current_thread().name})
+
+    with TestClient(app) as client:
+        responses = [client.post("/limited") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2"
+    # Checked once per request, never on the thread running the endpoint
+    assert len(threads) == 3
+    assert all(thread.name != responses[0].json()["loop_thread"] for thread in threads)
@@ -0,0 +1,52 @@
+import pytest
+from pydantic import ValidationError
+
+from app.api.v1.user.dto import validate_create_user
+from app.core.exception_handler import format_validation_errors
+
+
+VALID_USER = {"fname": "Jane", "lname": "Doe", "email": "jane@example.com", "password": "abc123!!x"}
+
+
+def details(payload: dict, first_error: bool = False) -> dict:
+    with pytest.raises(ValidationError) as caught:
+        validate_create_user(payload, first_error=first_error)
+    return format_validation_errors(caught.value.errors())
+
+
+@pytest.mark.parametrize("first_error", [False, True])
+def test_name_messages(first_error):
+    assert details({**VALID_USER, "fname": "Jane 1"}, first_error) == {"fname": "Value error, must not contain spaces"}
+    assert details({**VALID_USER, "lname": "Doe1"}, first_error) == {"lname": "Value error, must only contain letters"}
+    assert details({**VALID_USER, "lname": ""}, first_error) == {"lname": "Value error, must only contain letters"}
+
+
+@pytest.mark.parametrize("first_error", [False, True])
+def test_email_messages(first_error):
+    assert details({**VALID_USER, "email": "jane"}, first_error) == {
+        "email": "value is not a valid email address: An email address must have an @-sign."
+    }
+    assert details({**VALID_USER, "email": "jane@example"}, first_error) == {
+        "email": "value is not a valid email address: The part after the @-sign is not valid. It should have a period."
+    }
+
+
+def test_password_messages():
+    assert details({**VALID_USER, "password": "short"}) == {"password": "String should have at least 8 characters"}
+    assert details({**VALID_USER, "password": "abcdefgh1"}) == {
+        "password": "Value error, must contain at least one special character"
+    }
+
+
+@pytest.mark.parametrize("first_error", [False, True])
+def test_length_bounds(first_error):
+    assert details({**VALID_USER, "lname": "a" * 101}, first_error) == {"lname": "String should have at most 100 characters"}
+    assert details({**VALID_USER, "password": "x" * 127 + "1!"}, first_error) == {
+        "password": "String should have at most 128 characters"
+    }
+
+
+def test_values_at_the_bounds_are_accepted():
+    user = validate_create_user({**VALID_USER, "lname": "a" * 100, "password": "x" * 126 + "1!"})
+    assert len(user.lname) == 100
+    assert len(user.password) == 128